@@ -1,10 +1,13 @@
 from flask import Flask
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+from flask_caching import Cache
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
 from werkzeug.middleware.proxy_fix import ProxyFix
 from datetime import datetime
 import json
 import logging
+import orjson
 import os
 
 from config import get_config
@@ -23,6 +26,28 @@ class Base(DeclarativeBase):
 # Initialize SQLAlchemy with the base class
 db = SQLAlchemy(model_class=Base)
 
+# Application cache, shared between workers when backed by Redis
+cache = Cache()
+
+
+class ORJSONProvider(JSONProvider):
+    """
+    JSON provider that serializes with orjson.
+    
+    Keys are sorted and non-string keys allowed as with Flask's default provider. Dates and
+    other types orjson doesn't handle natively go through the default provider's conversion,
+    so responses keep the same format.
+    """
+    
+    options = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=DefaultJSONProvider.default, option=self.options).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
 def create_app(config_object=None):
     """Create and configure the Flask application."""
     # Set template folder to the root template directory
@@ -38,8 +63,12 @@ def create_app(config_object=None):
     # Configure ProxyFix for proper URL generation behind a proxy
     app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
     
+    # Use orjson for jsonify and request parsing
+    app.json = ORJSONProvider(app)
+    
     # Initialize extensions
     db.init_app(app)
+    cache.init_app(app)
     
     # Register template filters
     @app.template_filter('datetime')
@@ -52,6 +81,9 @@ def create_app(config_object=None):
     def from_json(value):
         if not value:
             return {}
+        if isinstance(value, (dict, list)):
+            # JSON columns are already parsed
+            return value
         try:
             return json.loads(value)
         except (json.JSONDecodeError, TypeError):
@@ -87,11 +119,6 @@ def create_app(config_object=None):
         db.create_all()
         logger.info("Database tables created")
         
-        # Start the background scheduler for periodic tasks
-        from app.services.scheduler_service import start_scheduler
-        scheduler = start_scheduler(app)
-        app.config['SCHEDULER'] = scheduler
-        
         # Sync SEMrush issues metadata
         try:
             logger.info("Syncing SEMrush issues metadata...")
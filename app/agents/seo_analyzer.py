@@ -11,6 +11,9 @@ from typing import List, Dict, Optional
 
 logger = logging.getLogger(__name__)
 
+# Number of detailed issues included in the insights prompt
+ISSUES_SAMPLE_SIZE = 5
+
 # Define Pydantic models for structured output parsing
 class SEOInsight(BaseModel):
     """Model for SEO insights from analysis."""
@@ -36,6 +39,33 @@ class SiteAnalysisResponse(BaseModel):
     error_solutions: Dict[str, str] = Field(description="Map of error IDs to solution descriptions")
 
 
+def summarize_raw_data(raw_data):
+    """
+    Reduce raw SEMrush analysis data to the parts generate_insights uses.
+    
+    The summary has the same shape as the raw data, so it can be passed to generate_insights
+    in its place, and summarizing a summary returns it unchanged.
+    
+    Args:
+        raw_data (dict): Raw analysis data from SEMrush
+    
+    Returns:
+        dict: Sample of the issues and the issue types by category, or None if there is no data
+    """
+    if not raw_data:
+        return None
+    
+    details = raw_data.get('details', {})
+    return {
+        'issues': raw_data.get('issues', [])[:ISSUES_SAMPLE_SIZE],
+        'details': {
+            'error_types': details.get('error_types', []),
+            'warning_types': details.get('warning_types', []),
+            'notice_types': details.get('notice_types', [])
+        }
+    }
+
+
 def generate_insights(website, errors=0, warnings=0, notices=0, broken=0, redirected=0, healthy=0, raw_data=None):
     """
     Generate AI-driven insights from SEO analysis data using LangChain.
@@ -48,7 +78,7 @@ def generate_insights(website, errors=0, warnings=0, notices=0, broken=0, redire
         broken (int): Number of broken pages
         redirected (int): Number of redirected pages
         healthy (int): Number of healthy pages
-        raw_data (dict, optional): Raw analysis data from SEMrush
+        raw_data (dict, optional): Raw analysis data from SEMrush, or its summarize_raw_data summary
         
     Returns:
         dict: AI-generated insights, recommendations, and summary
@@ -89,11 +119,12 @@ def generate_insights(website, errors=0, warnings=0, notices=0, broken=0, redire
         warning_types = []
         notice_types = []
         
-        if raw_data:
-            issues = raw_data.get('issues', [])
-            error_types = raw_data.get('details', {}).get('error_types', [])
-            warning_types = raw_data.get('details', {}).get('warning_types', [])
-            notice_types = raw_data.get('details', {}).get('notice_types', [])
+        summary = summarize_raw_data(raw_data)
+        if summary:
+            issues = summary['issues']
+            error_types = summary['details']['error_types']
+            warning_types = summary['details']['warning_types']
+            notice_types = summary['details']['notice_types']
         
         # No comparison data in this simplified version
         comparison_data = "No previous analysis data available for comparison."
@@ -131,8 +162,8 @@ def generate_insights(website, errors=0, warnings=0, notices=0, broken=0, redire
         # Create format instructions from the output parser
         format_instructions = parser.get_format_instructions()
         
-        # Prepare a sample of issues (limit to avoid token limits)
-        issues_sample = json.dumps(issues[:5] if len(issues) > 5 else issues)
+        # Prepare a sample of issues (already limited to avoid token limits)
+        issues_sample = json.dumps(issues)
         
         # Add additional context about the website
         site_info = f"""
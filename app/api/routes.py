@@ -1,13 +1,13 @@
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, Response, jsonify, request, current_app, stream_with_context
 import logging
-import json
 from datetime import datetime
 
 from app import db
-from app.models.database import Client, SiteAnalysis, ConversationHistory, AgentTask
+from app.models.database import Client, SiteAnalysis, AnalysisError, ConversationHistory, AgentTask
 from app.services.semrush_service import perform_site_analysis
-from app.agents.seo_analyzer import generate_insights
+from app.agents.seo_analyzer import generate_insights, summarize_raw_data
 from app.agents.recommendation_engine import generate_recommendations
+from app.utils.helpers import invalidate_report_views, invalidate_active_clients, iter_json_chunks
 
 logger = logging.getLogger(__name__)
 
@@ -68,6 +68,7 @@ def create_client():
     # Add to database and commit
     db.session.add(client)
     db.session.commit()
+    invalidate_active_clients()
     
     return jsonify({
         'id': client.id,
@@ -82,7 +83,7 @@ def create_client():
 @api_bp.route('/clients/<int:client_id>', methods=['GET'])
 def get_client(client_id):
     """Get a specific client by ID."""
-    client = Client.query.get_or_404(client_id)
+    client = db.get_or_404(Client, client_id)
     
     return jsonify({
         'id': client.id,
@@ -100,7 +101,7 @@ def get_client(client_id):
 @api_bp.route('/clients/<int:client_id>', methods=['PUT'])
 def update_client(client_id):
     """Update a specific client."""
-    client = Client.query.get_or_404(client_id)
+    client = db.get_or_404(Client, client_id)
     data = request.json
     
     if not data:
@@ -115,9 +116,12 @@ def update_client(client_id):
         client.email = data['email']
     if 'active' in data:
         client.active = data['active']
+    client.refresh_latest_context()
     
     # Update database
     db.session.commit()
+    invalidate_report_views(*[analysis.id for analysis in client.analyses])
+    invalidate_active_clients()
     
     return jsonify({
         'id': client.id,
@@ -132,11 +136,14 @@ def update_client(client_id):
 @api_bp.route('/clients/<int:client_id>', methods=['DELETE'])
 def delete_client(client_id):
     """Delete a specific client."""
-    client = Client.query.get_or_404(client_id)
+    client = db.get_or_404(Client, client_id)
+    analysis_ids = [analysis.id for analysis in client.analyses]
     
     # Delete from database
     db.session.delete(client)
     db.session.commit()
+    invalidate_report_views(*analysis_ids)
+    invalidate_active_clients()
     
     return jsonify({'message': f'Client {client_id} deleted successfully'})
 
@@ -144,14 +151,14 @@ def delete_client(client_id):
 @api_bp.route('/clients/<int:client_id>/analyze', methods=['POST'])
 def analyze_client(client_id):
     """Run analysis for a specific client."""
-    client = Client.query.get_or_404(client_id)
+    client = db.get_or_404(Client, client_id)
     
     # Create a task for the analysis
     task = AgentTask(
         client_id=client_id,
         task_type='analysis',
         status='pending',
-        parameters=json.dumps({'client_id': client_id})
+        parameters={'client_id': client_id}
     )
     db.session.add(task)
     db.session.commit()
@@ -179,11 +186,13 @@ def analyze_client(client_id):
             total_errors=analysis_data.get('details', {}).get('errors', 0),
             total_warnings=analysis_data.get('details', {}).get('warnings', 0),
             total_notices=analysis_data.get('details', {}).get('notices', 0),
-            raw_response=str(analysis_data)
+            raw_response=analysis_data,
+            issue_summary=summarize_raw_data(analysis_data)
         )
         
         db.session.add(analysis)
         db.session.commit()
+        invalidate_report_views()
         
         # Get the previous analysis for comparison
         previous_analysis = SiteAnalysis.query.filter_by(client_id=client.id) \
@@ -201,12 +210,14 @@ def analyze_client(client_id):
         # Update task status
         task.status = 'completed'
         task.completed_at = datetime.utcnow()
-        task.result = json.dumps({
+        task.result = {
             'analysis_id': analysis.id,
             'summary': analysis.summary
-        })
+        }
+        client.refresh_latest_context()
         
         db.session.commit()
+        invalidate_report_views()
         
         return jsonify({
             'task_id': task.id,
@@ -229,10 +240,10 @@ def analyze_client(client_id):
 @api_bp.route('/analyses/<int:analysis_id>', methods=['GET'])
 def get_analysis(analysis_id):
     """Get a specific analysis by ID."""
-    analysis = SiteAnalysis.query.get_or_404(analysis_id)
+    analysis = db.get_or_404(SiteAnalysis, analysis_id)
     
-    # Get all errors for this analysis
-    errors = [{
+    # Read the errors for this analysis in batches while the response is streamed
+    errors = ({
         'id': error.id,
         'error_type': error.error_type,
         'category': error.category,
@@ -241,9 +252,12 @@ def get_analysis(analysis_id):
         'severity': error.severity,
         'impact': error.impact,
         'solution': error.solution
-    } for error in analysis.errors]
+    } for error in AnalysisError.query.filter_by(analysis_id=analysis.id)
+        .order_by(AnalysisError.id).yield_per(500))
     
-    return jsonify({
+    # Large audits have thousands of errors, so send them in chunks instead of building
+    # the whole document in memory
+    analysis_data = {
         'id': analysis.id,
         'client_id': analysis.client_id,
         'analysis_date': analysis.analysis_date.isoformat() if analysis.analysis_date else None,
@@ -252,9 +266,10 @@ def get_analysis(analysis_id):
         'total_notices': analysis.total_notices,
         'summary': analysis.summary,
         'insights': analysis.insights,
-        'recommendations': analysis.recommendations,
-        'errors': errors
-    })
+        'recommendations': analysis.recommendations
+    }
+    return Response(stream_with_context(iter_json_chunks(analysis_data, 'errors', errors)),
+                    mimetype='application/json')
 
 
 @api_bp.route('/chat', methods=['POST'])
@@ -269,7 +284,7 @@ def chat():
     message = data['message']
     
     # Get the client
-    client = Client.query.get_or_404(client_id)
+    client = db.get_or_404(Client, client_id)
     
     # TODO: Implement the chat functionality using LangChain
     # For now, we'll just return a placeholder response
@@ -294,7 +309,7 @@ def chat():
 @api_bp.route('/tasks/<int:task_id>', methods=['GET'])
 def get_task(task_id):
     """Get the status of a specific task."""
-    task = AgentTask.query.get_or_404(task_id)
+    task = db.get_or_404(AgentTask, task_id)
     
     return jsonify({
         'id': task.id,
@@ -304,6 +319,6 @@ def get_task(task_id):
         'created_at': task.created_at.isoformat() if task.created_at else None,
         'started_at': task.started_at.isoformat() if task.started_at else None,
         'completed_at': task.completed_at.isoformat() if task.completed_at else None,
-        'result': json.loads(task.result) if task.result else None,
+        'result': task.result,
         'error_message': task.error_message
     })
\ No newline at end of file
@@ -1,6 +1,12 @@
 from datetime import datetime
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.ext.hybrid import hybrid_property
+from sqlalchemy.orm import deferred
 from app import db
 
+# JSON column type, stored as JSONB on PostgreSQL so values are kept pre-parsed
+JSONType = db.JSON().with_variant(JSONB(), 'postgresql')
+
 class Client(db.Model):
     """Model for storing client information."""
     id = db.Column(db.Integer, primary_key=True)
@@ -16,16 +22,49 @@ class Client(db.Model):
     semrush_project_name = db.Column(db.String(255))
     semrush_owner_id = db.Column(db.String(100))
     
+    # Chat context summarizing the latest analysis, kept up to date by refresh_latest_context;
+    # empty for clients without an analysis, and NULL until it is first built
+    latest_context = db.Column(db.Text)
+    
     # Relationships
     analyses = db.relationship('SiteAnalysis', backref='client', lazy=True, cascade="all, delete-orphan")
     conversation_history = db.relationship('ConversationHistory', backref='client', lazy=True, cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<Client {self.name}>"
+    
+    def refresh_latest_context(self):
+        """
+        Rebuild the chat context from the client's most recent analysis.
+        
+        Call this when an analysis is added, its summary or insights change, or the website
+        changes; the caller commits.
+        """
+        recent_analysis = SiteAnalysis.query.filter_by(client_id=self.id) \
+            .order_by(SiteAnalysis.analysis_date.desc()).first()
+        
+        if not recent_analysis:
+            # Empty rather than NULL, so it is not rebuilt on every chat query
+            self.latest_context = ''
+            return
+        
+        self.latest_context = f"""
+            Website: {self.website}
+            Recent analysis date: {recent_analysis.analysis_date}
+            Summary: {recent_analysis.summary if recent_analysis.summary else 'No summary available'}
+            Total errors: {recent_analysis.total_errors}
+            Total warnings: {recent_analysis.total_warnings}
+            Total notices: {recent_analysis.total_notices}
+            Insights: {recent_analysis.insights if recent_analysis.insights else 'No insights available'}
+            """
 
 
 class SiteAnalysis(db.Model):
     """Model for storing website analysis results."""
+    __table_args__ = (
+        db.Index('ix_site_analysis_client_date', 'client_id', db.text('analysis_date DESC')),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     client_id = db.Column(db.Integer, db.ForeignKey('client.id'), nullable=False)
     analysis_date = db.Column(db.DateTime, default=datetime.utcnow)
@@ -45,9 +84,10 @@ class SiteAnalysis(db.Model):
     total_pages_crawled = db.Column(db.Integer, default=0)
     total_pages_limit = db.Column(db.Integer, default=0)
     
-    # Additional SEMrush data
-    raw_response = db.Column(db.Text)  # Store the raw JSON response
-    defects = db.Column(db.Text)  # JSON string with defect details
+    # Additional SEMrush data (large JSON payloads, only loaded when accessed)
+    raw_response = deferred(db.Column(JSONType))  # Store the raw JSON response
+    defects = deferred(db.Column(JSONType))  # Defect details
+    issue_summary = deferred(db.Column(JSONType))  # Parts of raw_response used for AI insights
     pages_with_issues = db.Column(db.Integer, default=0)
     pages_with_issues_delta = db.Column(db.Integer, default=0)
     
@@ -59,12 +99,37 @@ class SiteAnalysis(db.Model):
     # Relationships
     errors = db.relationship('AnalysisError', backref='analysis', lazy=True, cascade="all, delete-orphan")
     
+    @property
+    def raw_data(self):
+        """
+        The raw SEMrush response.
+        
+        Returns:
+            dict: The raw response data, or an empty dict if there is none
+        """
+        return self.raw_response or {}
+    
+    @hybrid_property
+    def total_issues(self):
+        """Total errors, warnings and notices; usable in queries as well as on instances."""
+        return (self.total_errors or 0) + (self.total_warnings or 0) + (self.total_notices or 0)
+    
+    @total_issues.expression
+    def total_issues(cls):
+        return (db.func.coalesce(cls.total_errors, 0)
+                + db.func.coalesce(cls.total_warnings, 0)
+                + db.func.coalesce(cls.total_notices, 0))
+    
     def __repr__(self):
         return f"<SiteAnalysis {self.id} for client {self.client_id}>"
 
 
 class AnalysisError(db.Model):
     """Model for storing individual errors found during analysis."""
+    __table_args__ = (
+        db.Index('ix_analysis_error_analysis_id', 'analysis_id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     analysis_id = db.Column(db.Integer, db.ForeignKey('site_analysis.id'), nullable=False)
     error_type = db.Column(db.String(50), nullable=False)  # 'error', 'warning', 'notice'
@@ -85,6 +150,11 @@ class AnalysisError(db.Model):
 
 class ConversationHistory(db.Model):
     """Model for storing conversation history with the AI."""
+    __table_args__ = (
+        db.Index('ix_conversation_history_client_id', 'client_id'),
+        db.Index('ix_conversation_history_timestamp', db.text('timestamp DESC')),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     client_id = db.Column(db.Integer, db.ForeignKey('client.id'), nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
@@ -101,6 +171,10 @@ class ConversationHistory(db.Model):
 
 class AgentTask(db.Model):
     """Model for storing agent tasks and their status."""
+    __table_args__ = (
+        db.Index('ix_agent_task_client_id', 'client_id'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     client_id = db.Column(db.Integer, db.ForeignKey('client.id'), nullable=False)
     task_type = db.Column(db.String(50), nullable=False)  # e.g., 'analysis', 'recommendation', 'research'
@@ -110,10 +184,62 @@ class AgentTask(db.Model):
     completed_at = db.Column(db.DateTime)
     
     # Task details
-    parameters = db.Column(db.Text)  # JSON string of parameters
-    result = db.Column(db.Text)  # JSON string of result
+    parameters = db.Column(JSONType)  # Task parameters
+    result = db.Column(JSONType)  # Task result
     error_message = db.Column(db.Text)
     
+    @property
+    def params(self):
+        """
+        Task parameters.
+        
+        Changes to the dict in place are not saved; use update_params instead.
+        
+        Returns:
+            dict: The task parameters
+        """
+        return self.parameters or {}
+    
+    def update_params(self, **kwargs):
+        """
+        Merge values into the task parameters and write them back to the parameters column.
+        
+        Args:
+            **kwargs: Parameter values to set
+        """
+        self.parameters = {**self.params, **kwargs}
+    
+    def claim_stage(self, expected_stage, new_stage, **kwargs):
+        """
+        Atomically move the task from one stage to another.
+        
+        The update only applies if the parameters column still holds what this instance
+        last read, so when several pollers race for the same transition exactly one wins.
+        
+        Args:
+            expected_stage (str): Stage the task must currently be in
+            new_stage (str): Stage to move the task to
+            **kwargs: Other parameter values to set along with the stage
+        
+        Returns:
+            bool: True if this caller made the transition, False otherwise
+        """
+        if self.params.get('stage') != expected_stage:
+            return False
+        
+        params = dict(self.params)
+        params.update(kwargs)
+        params['stage'] = new_stage
+        
+        result = db.session.execute(
+            db.update(AgentTask)
+            .where(AgentTask.id == self.id, AgentTask.parameters == self.parameters)
+            .values(parameters=params)
+            .execution_options(synchronize_session=False)
+        )
+        db.session.commit()
+        return result.rowcount == 1
+    
     def __repr__(self):
         return f"<AgentTask {self.id} of type {self.task_type} for client {self.client_id}>"
 
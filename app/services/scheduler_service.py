@@ -1,5 +1,5 @@
 import logging
-import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
@@ -7,12 +7,24 @@ from apscheduler.triggers.interval import IntervalTrigger
 from flask import current_app
 
 from app import db
-from app.models.database import Client, SiteAnalysis, AgentTask, AnalysisError
-from app.services.semrush_service import perform_site_analysis, check_audit_status, get_audit_issues, process_audit_issues
+from app.models.database import Client, SiteAnalysis, AgentTask
+from app.services.semrush_service import perform_site_analysis, check_audit_status
+from app.services.worker_service import submit_job
 from app.agents.seo_analyzer import generate_insights
 
 logger = logging.getLogger(__name__)
 
+# How long audit results may stay in the 'ingesting' stage before ingestion is queued again
+INGEST_TIMEOUT = timedelta(minutes=15)
+
+# How long an analysis task may stay in one of these stages before it is marked failed,
+# e.g. because the process initiating it was restarted before the audit was started
+START_TIMEOUT = timedelta(minutes=15)
+STARTING_STAGES = ('starting', 'starting_analysis')
+
+# Maximum number of SEMrush audit status checks made at the same time
+STATUS_CHECK_THREADS = 8
+
 def weekly_analysis_job(app=None):
     """
     Job to run weekly analysis for all active clients.
@@ -40,20 +52,20 @@ def weekly_analysis_job(app=None):
                         client_id=client.id,
                         task_type='analysis',
                         status='pending',
-                        parameters=json.dumps({
+                        parameters={
                             'client_id': client.id,
                             'website': client.website,
                             'stage': 'init'
-                        })
+                        }
                     )
                     db.session.add(task)
                     db.session.commit()
                     
-                    # Import process_analysis_task here to avoid circular imports
-                    from app.web_routes import process_analysis_task  
+                    # Import run_analysis_task here to avoid circular imports
+                    from app.web_routes import run_analysis_task
                     
-                    # Process the task
-                    process_analysis_task(task)
+                    # Process the task on the background worker pool
+                    submit_job(run_analysis_task, task.id)
                     
                     logger.info(f"Analysis scheduled for client: {client.name}")
                     
@@ -101,6 +113,45 @@ def daily_insight_job(app=None):
     logger.info("Daily insight job completed")
 
 
+def _check_audit_statuses(api_key, tasks):
+    """
+    Check the SEMrush audit status of several tasks concurrently.
+    
+    The checks share the pooled SEMrush session, so they reuse its keep-alive connections.
+    
+    Args:
+        api_key (str): SEMrush API key
+        tasks (list): Running analysis tasks
+    
+    Returns:
+        dict: Audit status by task ID, for the tasks waiting on an audit
+    """
+    pending = {}
+    for task in tasks:
+        params = task.params
+        if params.get('stage') == 'audit_started' and not params.get('skip_future_checks') \
+                and params.get('project_id') and params.get('snapshot_id'):
+            pending[task.id] = (params['project_id'], params['snapshot_id'])
+    
+    if not api_key or not pending:
+        return {}
+    
+    with ThreadPoolExecutor(max_workers=min(len(pending), STATUS_CHECK_THREADS)) as executor:
+        futures = {}
+        for task_id, (project_id, snapshot_id) in pending.items():
+            logger.info(f"Checking audit status for project {project_id}, snapshot {snapshot_id}")
+            futures[task_id] = executor.submit(check_audit_status, api_key, project_id, snapshot_id)
+    
+    audit_statuses = {}
+    for task_id, future in futures.items():
+        try:
+            audit_statuses[task_id] = future.result()
+        except Exception as e:
+            logger.exception(f"Error checking audit status for task {task_id}: {str(e)}")
+            audit_statuses[task_id] = None
+    return audit_statuses
+
+
 def check_running_audits_job(app=None):
     """
     Job to periodically check the status of SEMrush audits for running tasks.
@@ -123,6 +174,9 @@ def check_running_audits_job(app=None):
             
             logger.info(f"Found {len(running_tasks)} running analysis tasks to check")
             
+            # Check the audits of all waiting tasks up front, concurrently
+            audit_statuses = _check_audit_statuses(app.config.get('SEMRUSH_API_KEY'), running_tasks)
+            
             for task in running_tasks:
                 try:
                     # Parse the task parameters
@@ -130,7 +184,7 @@ def check_running_audits_job(app=None):
                         logger.warning(f"Task {task.id} has no parameters, skipping")
                         continue
                     
-                    params = json.loads(task.parameters)
+                    params = task.params
                     stage = params.get('stage')
                     
                     # Skip tasks that are marked to be excluded from future checks
@@ -138,6 +192,30 @@ def check_running_audits_job(app=None):
                         logger.info(f"Task {task.id} is marked to skip future checks, skipping")
                         continue
                     
+                    # Fail tasks whose initiation has not finished in time. They are not started
+                    # again, since that could create a second SEMrush project for the client.
+                    if stage in STARTING_STAGES:
+                        if task.started_at and datetime.utcnow() - task.started_at > START_TIMEOUT:
+                            if task.claim_stage(stage, 'failed', skip_future_checks=True):
+                                task.status = 'failed'
+                                task.error_message = "Analysis did not start in time, please run it again"
+                                task.completed_at = datetime.utcnow()
+                                db.session.commit()
+                                logger.warning(f"Task {task.id} was stuck in the '{stage}' stage, marked it failed")
+                        continue
+                    
+                    # Queue ingestion again if it has not finished in time, e.g. because the
+                    # process running it was restarted
+                    if stage == 'ingesting':
+                        started_at = params.get('ingest_started_at')
+                        if started_at and datetime.utcnow() - datetime.fromisoformat(started_at) > INGEST_TIMEOUT:
+                            if task.claim_stage('ingesting', 'ingesting', ingest_started_at=datetime.utcnow().isoformat()):
+                                # Import here to avoid circular imports
+                                from app.web_routes import ingest_audit_results
+                                logger.warning(f"Ingestion of task {task.id} timed out, queueing it again")
+                                submit_job(ingest_audit_results, task.id)
+                        continue
+                    
                     # Only process tasks that have started a SEMrush audit
                     if stage == 'audit_started':
                         project_id = params.get('project_id')
@@ -148,7 +226,7 @@ def check_running_audits_job(app=None):
                             continue
                         
                         # Get client info for domain
-                        client = Client.query.get(task.client_id)
+                        client = db.session.get(Client, task.client_id)
                         if not client:
                             logger.warning(f"Client {task.client_id} not found for task {task.id}, skipping")
                             continue
@@ -159,9 +237,8 @@ def check_running_audits_job(app=None):
                             logger.error("SEMrush API key not found in configuration")
                             continue
                         
-                        # Check audit status
-                        logger.info(f"Checking audit status for project {project_id}, snapshot {snapshot_id}")
-                        audit_status = check_audit_status(api_key, project_id, snapshot_id)
+                        # Get the audit status checked above
+                        audit_status = audit_statuses.get(task.id)
                         
                         if not audit_status:
                             logger.warning(f"Could not get audit status for project {project_id}")
@@ -170,172 +247,30 @@ def check_running_audits_job(app=None):
                         logger.info(f"Audit status for project {project_id}: {audit_status}")
                         
                         if audit_status.upper() in ["DONE", "FINISHED"]:
-                            # Audit is complete, get audit issues
-                            logger.info(f"Audit complete for project {project_id}, getting issues data")
-                            issues_data = get_audit_issues(api_key, project_id, snapshot_id, client.website)
-                            
-                            if issues_data:
-                                # Process audit issues and create SiteAnalysis record
-                                processed_data = process_audit_issues(issues_data, client.website)
-                                
-                                # Create a new SiteAnalysis record
-                                defects = processed_data.get('defects', {})
-                                campaign_info = processed_data.get('campaign_info', {})
-                                
-                                # Create analysis record
-                                analysis = SiteAnalysis(
-                                    client_id=client.id,
-                                    semrush_project_id=project_id,
-                                    semrush_snapshot_id=snapshot_id,
-                                    total_errors=campaign_info.get('errors', 0),
-                                    total_warnings=campaign_info.get('warnings', 0),
-                                    total_notices=campaign_info.get('notices', 0),
-                                    total_broken=campaign_info.get('broken', 0),
-                                    total_blocked=campaign_info.get('blocked', 0),
-                                    total_redirected=campaign_info.get('redirected', 0),
-                                    total_healthy=campaign_info.get('healthy', 0),
-                                    total_pages_crawled=campaign_info.get('pages_crawled', 0),
-                                    pages_with_issues=campaign_info.get('have_issues', 0),
-                                    defects=json.dumps(defects),
-                                    raw_response=json.dumps(processed_data)
-                                )
-                                
-                                db.session.add(analysis)
-                                db.session.commit()
-                                
-                                # Add specific errors as AnalysisError records
-                                if defects:
-                                    # Loop through the defects by category (errors, warnings, notices)
-                                    for category_key, category_data in defects.items():
-                                        # Get the error type (error, warning, notice)
-                                        error_type = category_data.get('group', 'warning')
-                                        severity_base = category_data.get('severity', 5)
-                                        
-                                        # Extract items from each category
-                                        items = category_data.get('items', [])
-                                        
-                                        for item in items:
-                                            # For each item, create an AnalysisError record
-                                            # Get issue id and count from the item
-                                            issue_id = item.get('id', 'Unknown')
-                                            count = item.get('count', 1)
-                                            
-                                            error = AnalysisError(
-                                                analysis_id=analysis.id,
-                                                error_type=error_type,
-                                                category=category_key.capitalize(),  # Use the category key as category
-                                                description=item.get('text', f"Issue ID: {issue_id}"),
-                                                url=item.get('url', ''),
-                                                severity=severity_base,
-                                                semrush_issue_id=str(issue_id),
-                                                count=count
-                                            )
-                                            db.session.add(error)
-                                    
-                                    # Also extract detailed issues from the raw data if available
-                                    raw_info = processed_data.get('raw_info', {})
-                                    defect_ids = raw_info.get('defects', {})
-                                    
-                                    # Get the full error, warning, notice arrays from the current_snapshot if available
-                                    current_snapshot = raw_info.get('current_snapshot', {})
-                                    if not current_snapshot:
-                                        current_snapshot = raw_info  # Sometimes data is at the root level
-                                    
-                                    # Extract semrush issue classifications
-                                    semrush_errors = []
-                                    semrush_warnings = []
-                                    semrush_notices = []
-                                    
-                                    # Get the actual errors, warnings, notices arrays with their correct categorizations
-                                    if isinstance(current_snapshot.get('errors'), list):
-                                        semrush_errors = [str(item.get('id')) for item in current_snapshot.get('errors', []) if item.get('count', 0) > 0]
-                                    if isinstance(current_snapshot.get('warnings'), list):
-                                        semrush_warnings = [str(item.get('id')) for item in current_snapshot.get('warnings', []) if item.get('count', 0) > 0]
-                                    if isinstance(current_snapshot.get('notices'), list):
-                                        semrush_notices = [str(item.get('id')) for item in current_snapshot.get('notices', []) if item.get('count', 0) > 0]
-                                    
-                                    logger.info(f"SEMrush categorization - Errors: {semrush_errors}, Warnings: {semrush_warnings}, Notices: {semrush_notices}")
-                                    
-                                    # If we have detailed defect IDs, add them as specific errors
-                                    for defect_id, count in defect_ids.items():
-                                        if isinstance(defect_id, str) and isinstance(count, int) and count > 0:
-                                            # Determine type and severity based on SEMrush's categorization
-                                            if defect_id in semrush_errors:
-                                                error_type = 'error'
-                                                severity = 8
-                                            elif defect_id in semrush_warnings:
-                                                error_type = 'warning'
-                                                severity = 5
-                                            elif defect_id in semrush_notices:
-                                                error_type = 'notice'
-                                                severity = 3
-                                            else:
-                                                # Fallback logic if not found in any category
-                                                issue_id_int = int(defect_id)
-                                                if issue_id_int < 100:
-                                                    error_type = 'error'
-                                                    severity = 8
-                                                elif issue_id_int < 200:
-                                                    error_type = 'warning'
-                                                    severity = 5
-                                                else:
-                                                    error_type = 'notice'
-                                                    severity = 3
-                                            
-                                            # Create error record for each defect type with proper categorization
-                                            error = AnalysisError(
-                                                analysis_id=analysis.id,
-                                                error_type=error_type,
-                                                category='SEMrush Issue ID',
-                                                description=f"Issue ID: {defect_id} (Found on {count} pages)",
-                                                url='',
-                                                severity=severity,
-                                                semrush_issue_id=defect_id,
-                                                count=count
-                                            )
-                                            db.session.add(error)
-                                    
-                                    # Commit all the error records
-                                    db.session.commit()
-                                
-                                # Update the task to completed status
-                                task.status = 'completed'
-                                task.completed_at = datetime.utcnow()
-                                task.result = json.dumps({'analysis_id': analysis.id})
-                                # Mark this task to skip future checks since it's now completed
-                                params['skip_future_checks'] = True
-                                task.parameters = json.dumps(params)
-                                db.session.commit()
-                                
-                                logger.info(f"Task {task.id} completed successfully")
+                            # Audit is complete; ingest the results on a background worker the same
+                            # way the status poll does, unless a concurrent poll has claimed them
+                            # Import here to avoid circular imports
+                            from app.web_routes import queue_audit_ingestion
+                            if queue_audit_ingestion(task, params):
+                                logger.info(f"Audit complete for project {project_id}, queued ingestion of task {task.id}")
                             else:
-                                # No issues data, mark as failed
-                                task.status = 'failed'
-                                task.error_message = "Failed to get audit issues data"
-                                task.completed_at = datetime.utcnow()
-                                # Mark this task to skip future checks
-                                params['skip_future_checks'] = True
-                                task.parameters = json.dumps(params)
-                                db.session.commit()
-                                
-                                logger.error(f"Task {task.id} failed - no audit issues data")
+                                logger.info(f"Results of task {task.id} are already being ingested, skipping")
                         elif audit_status.upper() == "FAILED":
                             # Audit failed, update task status
                             task.status = 'failed'
                             task.error_message = "SEMrush audit failed"
                             task.completed_at = datetime.utcnow()
                             # Mark this task to skip future checks
-                            params['skip_future_checks'] = True
-                            task.parameters = json.dumps(params)
+                            task.update_params(skip_future_checks=True)
                             db.session.commit()
                             
                             logger.error(f"Task {task.id} failed - SEMrush audit failed")
                         else:
                             # Audit is still in progress, just update the parameters with the current status
                             # This ensures we keep track of the latest status but don't modify the task's overall status
-                            params['audit_status'] = audit_status
-                            task.parameters = json.dumps(params)
-                            db.session.commit()
+                            if params.get('audit_status') != audit_status:
+                                task.update_params(audit_status=audit_status)
+                                db.session.commit()
                             
                             logger.info(f"Task {task.id} still in progress, status: {audit_status}")
                 except Exception as e:
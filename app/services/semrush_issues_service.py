@@ -1,11 +1,11 @@
 import os
-import requests
 import logging
-import json
+import orjson
 from datetime import datetime
 
 from app import db
 from app.models.database import SemrushIssue
+from app.services.semrush_service import semrush_session
 
 logger = logging.getLogger(__name__)
 
@@ -47,14 +47,14 @@ def fetch_semrush_issue_meta():
         }
         
         logger.info("Fetching SEMrush issue metadata")
-        response = requests.get(url, params=params)
+        response = semrush_session.get(url, params=params)
         
         if response.status_code == 200:
             try:
                 # Log raw response for debugging
                 logger.info(f"Raw response: {response.text[:100]}...")
                 
-                data = response.json()
+                data = orjson.loads(response.content)
                 
                 # The response contains a property called 'issues' that holds the list of issues
                 # For debugging (to understand the response structure)
@@ -71,7 +71,7 @@ def fetch_semrush_issue_meta():
                 else:
                     logger.info(f"Response is a dictionary with keys: {data.keys() if isinstance(data, dict) else 'not a dict'}")
                     return data
-            except json.JSONDecodeError:
+            except orjson.JSONDecodeError:
                 logger.error("Failed to parse SEMrush response as JSON")
                 logger.debug(f"Response content: {response.text[:500]}...")
                 return None
@@ -128,7 +128,7 @@ def sync_semrush_issues():
                 int_issue_id = int(issue_id)
                 
                 # Check if issue already exists
-                existing_issue = SemrushIssue.query.get(int_issue_id)
+                existing_issue = db.session.get(SemrushIssue, int_issue_id)
                 
                 # Extract fields with fallbacks
                 title = issue_data.get('title', '') if isinstance(issue_data, dict) else str(issue_data)
@@ -192,7 +192,7 @@ def get_issue_title(issue_id):
             logger.warning(f"Could not convert issue_id {issue_id} to integer")
             return None
             
-        issue = SemrushIssue.query.get(int_issue_id)
+        issue = db.session.get(SemrushIssue, int_issue_id)
         return issue.title if issue else None
     except Exception as e:
         logger.exception(f"Error getting issue title for ID {issue_id}: {str(e)}")
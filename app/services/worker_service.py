@@ -0,0 +1,54 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+
+logger = logging.getLogger(__name__)
+
+# Shared thread pool for work that should not run on the request thread
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Get the shared background worker pool, creating it on first use.
+    
+    Returns:
+        ThreadPoolExecutor: The worker pool
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            max_workers = current_app.config.get('WORKER_THREADS', 4)
+            _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='worker')
+            logger.info(f"Started background worker pool with {max_workers} threads")
+    return _executor
+
+
+def submit_job(func, *args, **kwargs):
+    """
+    Run a function on the background worker pool inside an application context.
+    
+    Must be called from within an application context (a request or a scheduler job).
+    
+    Args:
+        func (callable): The function to run
+        *args: Positional arguments for the function
+        **kwargs: Keyword arguments for the function
+    
+    Returns:
+        Future: The job; its result is the function's return value
+    """
+    app = current_app._get_current_object()
+    return get_executor().submit(_run_job, app, func, args, kwargs)
+
+
+def _run_job(app, func, args, kwargs):
+    """Run a background job with an application context and log any failure."""
+    with app.app_context():
+        try:
+            return func(*args, **kwargs)
+        except Exception as e:
+            logger.exception(f"Error in background job {func.__name__}: {str(e)}")
+            raise
@@ -1,9 +1,28 @@
 import logging
+from collections import namedtuple
 from datetime import datetime
+from functools import lru_cache
+from itertools import islice
 import json
+import orjson
+from cachetools.func import ttl_cache
+from flask import current_app
+
+from app import cache
+from app.models.database import Client
 
 logger = logging.getLogger(__name__)
 
+# Lightweight client entry for the client dropdowns
+ActiveClient = namedtuple('ActiveClient', ['id', 'name', 'website'])
+
+# Cache types shared between worker processes (and the scheduler process); the per-process
+# caches can't be invalidated from another process
+SHARED_CACHE_TYPES = {
+    'RedisCache', 'RedisSentinelCache', 'RedisClusterCache',
+    'MemcachedCache', 'SASLMemcachedCache', 'FileSystemCache'
+}
+
 def get_comparison_data(previous_analysis, current_analysis):
     """
     Compare the current analysis with the previous one and generate comparison data.
@@ -82,10 +101,15 @@ def get_comparison_data(previous_analysis, current_analysis):
         }
 
 
+@lru_cache(maxsize=4096)
 def calculate_percent_change(old_value, new_value):
     """
     Calculate the percentage change between two values.
     
+    Results are memoized, as dashboards compare many repeated pairs of counts
+    (zeros, unchanged metrics). Arguments must be hashable; call
+    calculate_percent_change.cache_clear() to reset the cache.
+    
     Args:
         old_value: Previous value
         new_value: Current value
@@ -138,6 +162,81 @@ def format_date(date):
     return date.strftime('%Y-%m-%d %H:%M:%S')
 
 
+def has_shared_cache():
+    """
+    Check whether the application cache is shared between worker processes.
+    
+    Returns:
+        bool: True if the configured cache type is in SHARED_CACHE_TYPES
+    """
+    return current_app.config.get('CACHE_TYPE') in SHARED_CACHE_TYPES
+
+
+def invalidate_report_views(*analysis_ids):
+    """
+    Drop the cached dashboard and report pages after analyses or clients change.
+    
+    Args:
+        *analysis_ids: IDs of reports whose cached detail pages should also be dropped
+    """
+    keys = ['view//', 'view//reports']
+    keys.extend(f'view//reports/{analysis_id}' for analysis_id in analysis_ids)
+    try:
+        # Delete one at a time: some backends stop delete_many at the first missing key
+        for key in keys:
+            cache.delete(key)
+    except Exception as e:
+        logger.warning(f"Error invalidating cached report views: {str(e)}")
+
+
+@ttl_cache(maxsize=1, ttl=60)
+def get_active_clients():
+    """
+    Get the active clients for the client dropdowns.
+    
+    The list is cached for a minute; invalidate_active_clients drops it when clients change.
+    
+    Returns:
+        tuple: ActiveClient entries ordered by name
+    """
+    rows = Client.query.with_entities(Client.id, Client.name, Client.website) \
+        .filter_by(active=True).order_by(Client.name).all()
+    return tuple(ActiveClient(*row) for row in rows)
+
+
+def invalidate_active_clients():
+    """Drop the cached active clients list after a client is added, changed or deleted."""
+    get_active_clients.cache_clear()
+
+
+def iter_json_chunks(document, key, items, chunk_size=500):
+    """
+    Serialize a JSON object with one large list member piece by piece, for streaming responses.
+    
+    Args:
+        document (dict): The object's other members
+        key (str): Name of the list member, which is written last
+        items (iterable): Items of the list, serialized chunk_size at a time
+        chunk_size (int): Number of items serialized per chunk
+    
+    Yields:
+        bytes: Consecutive pieces of the JSON document
+    """
+    head = orjson.dumps(document, option=orjson.OPT_SORT_KEYS)[:-1]
+    yield head + (b',' if document else b'') + orjson.dumps(key) + b':['
+    
+    items = iter(items)
+    separator = b''
+    while True:
+        chunk = list(islice(items, chunk_size))
+        if not chunk:
+            break
+        yield separator + orjson.dumps(chunk)[1:-1]
+        separator = b','
+    
+    yield b']}'
+
+
 def safe_json_loads(json_str, default=None):
     """
     Safely load a JSON string.
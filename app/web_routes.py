@@ -1,47 +1,125 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, session
+from flask import (
+    Blueprint, Response, render_template, stream_template, request, redirect, url_for, flash, jsonify, session,
+    current_app
+)
 from datetime import datetime, timedelta
+import hashlib
 import logging
-import json
+import orjson
+import threading
 import time
-from sqlalchemy import desc
+import uuid
+from cachetools import TTLCache
+from collections import ChainMap
+from sqlalchemy import desc, insert
+from sqlalchemy.orm import contains_eager, joinedload, load_only
+from sqlalchemy.orm.attributes import set_committed_value
 from urllib.parse import urlparse
 
-from app import db
-from app.models.database import Client, SiteAnalysis, AnalysisError, ConversationHistory, AgentTask
-from app.services.semrush_service import perform_site_analysis
-from app.agents.seo_analyzer import generate_insights
+from app import db, cache
+from app.models.database import Client, SiteAnalysis, AnalysisError, ConversationHistory, AgentTask, SemrushIssue
+from app.services.semrush_service import (
+    perform_site_analysis, create_project, enable_site_audit, start_site_audit,
+    check_audit_status, fetch_audit_raw, process_audit_issues, semrush_session
+)
+from app.agents.seo_analyzer import generate_insights as _generate_insights_impl, summarize_raw_data
 from app.agents.recommendation_engine import generate_recommendations
 from app.agents.content_optimizer import optimize_content
 from app.services.llm_service import run_chat_query
-from app.utils.helpers import get_comparison_data, group_errors_by_category, format_date
+from app.services.worker_service import submit_job
+from app.utils.helpers import (
+    get_comparison_data, group_errors_by_category, format_date, invalidate_report_views,
+    get_active_clients, invalidate_active_clients, has_shared_cache
+)
 
 logger = logging.getLogger(__name__)
 
 # Create a blueprint for the web routes
 web_bp = Blueprint('web', __name__)
 
+# Number of analyses listed per page on the client detail page
+CLIENT_ANALYSES_PER_PAGE = 20
+
+# Reports with more errors than this are streamed to the browser instead of rendered in one piece
+STREAM_REPORT_ERRORS_THRESHOLD = 1000
+
+# Number of AnalysisError rows written per INSERT when ingesting audit results
+ERROR_INSERT_BATCH_SIZE = 1000
+
+# Error type and severity of each defect group in SEMrush audit data
+DEFECT_GROUP_TYPES = (('errors', 'error', 8), ('warnings', 'warning', 5), ('notices', 'notice', 3))
+
+# Task status responses are reused for this many seconds while the task state is unchanged,
+# so several tabs polling the same task share one SEMrush status check
+TASK_STATUS_CACHE_TTL = 10
+_task_status_cache = TTLCache(maxsize=4096, ttl=TASK_STATUS_CACHE_TTL)
+_task_status_cache_lock = threading.Lock()
+
+# Content optimization results are kept in the cache for this many seconds, with only their
+# key in the session cookie, when the cache is shared between worker processes
+OPTIMIZATION_RESULTS_TTL = 30 * 60
+
+# Fallback titles for common issues that are not in the SemrushIssue table
+FALLBACK_ISSUE_TITLES = {
+    1: "5xx server errors",
+    2: "4xx client errors",
+    3: "3xx redirects",
+    4: "Broken links",
+    6: "Connection timeout errors",
+    8: "HTTPS implementation issues",
+    12: "Mixed content issues",
+    102: "Missing meta descriptions",
+    104: "Missing title tags",
+    112: "Title too short",
+    117: "Title too long",
+    123: "Duplicate title tags",
+    202: "Low content pages",
+    213: "Missing alt attributes",
+    215: "Missing or invalid canonical URLs",
+    216: "Missing H1 headings",
+    217: "Multiple H1 headings",
+    218: "Broken images"
+}
+
+
+def _skip_page_cache():
+    """
+    Bypass the page cache while flash messages are waiting to be shown, or when the cache
+    isn't shared: invalidate_report_views could then only clear the process that calls it,
+    and the other workers would keep serving stale pages.
+    """
+    return '_flashes' in session or not has_shared_cache()
+
+
+def _is_cacheable_response(response):
+    """Only cache fully rendered pages; streamed ones can't be stored."""
+    return not (isinstance(response, Response) and response.is_streamed)
+
 
 @web_bp.route('/')
+@cache.cached(timeout=30, unless=_skip_page_cache)
 def index():
     """Home page with dashboard summary."""
     try:
-        # Get count of active clients
-        client_count = Client.query.filter_by(active=True).count()
-        
-        # Get count of analyses
-        analysis_count = SiteAnalysis.query.count()
-        
-        # Get total issues
-        total_issues = db.session.query(db.func.sum(SiteAnalysis.total_errors + SiteAnalysis.total_warnings + SiteAnalysis.total_notices)).scalar() or 0
+        # Get the count of active clients, the count of analyses and the total issues in one query
+        client_count, analysis_count, total_issues = db.session.query(
+            db.session.query(db.func.count(Client.id)).filter(Client.active == True).scalar_subquery(),
+            db.session.query(db.func.count(SiteAnalysis.id)).scalar_subquery(),
+            db.session.query(db.func.coalesce(db.func.sum(SiteAnalysis.total_issues), 0)).scalar_subquery()
+        ).one()
         
         # Get recent AI insights (placeholder for now)
         ai_insights = []
         
         # Get recent activity
         recent_activity = []
-        recent_analyses = SiteAnalysis.query.order_by(desc(SiteAnalysis.analysis_date)).limit(5).all()
+        recent_analyses = (SiteAnalysis.query
+                           .options(joinedload(SiteAnalysis.client))
+                           .order_by(desc(SiteAnalysis.analysis_date))
+                           .limit(5)
+                           .all())
         for analysis in recent_analyses:
-            client = Client.query.get(analysis.client_id)
+            client = analysis.client
             if client:
                 recent_activity.append({
                     'title': f"Analysis for {client.website}",
@@ -93,13 +171,14 @@ def add_client():
         try:
             db.session.add(client)
             db.session.commit()
+            invalidate_active_clients()
             
             # Create an analysis task for the new client
             task = AgentTask(
                 client_id=client.id,
                 task_type='analysis',
                 status='pending',
-                parameters=json.dumps({'client_id': client.id})
+                parameters={'client_id': client.id}
             )
             db.session.add(task)
             db.session.commit()
@@ -125,16 +204,19 @@ def add_client():
 @web_bp.route('/clients/<int:client_id>')
 def client_detail(client_id):
     """Show detailed information about a specific client."""
-    client = Client.query.get_or_404(client_id)
+    client = db.get_or_404(Client, client_id)
     
-    # Get all analyses for this client, sorted by date (newest first)
-    all_analyses = SiteAnalysis.query.filter_by(client_id=client_id).order_by(desc(SiteAnalysis.analysis_date)).all()
+    client_analyses = SiteAnalysis.query.filter_by(client_id=client_id).order_by(desc(SiteAnalysis.analysis_date))
     
-    # Get the most recent analysis
-    recent_analysis = all_analyses[0] if all_analyses else None
+    # Get the most recent analysis and the previous one for comparison
+    recent_analysis, previous_analysis = (client_analyses.limit(2).all() + [None, None])[:2]
     
-    # Get previous analysis for comparison
-    previous_analysis = all_analyses[1] if len(all_analyses) > 1 else None
+    # Get one page of this client's analyses, sorted by date (newest first)
+    pagination = client_analyses.paginate(
+        page=request.args.get('page', 1, type=int),
+        per_page=CLIENT_ANALYSES_PER_PAGE,
+        error_out=False
+    )
     
     # Get comparison data
     comparison = get_comparison_data(previous_analysis, recent_analysis)
@@ -145,13 +227,14 @@ def client_detail(client_id):
                           previous_analysis=previous_analysis,
                           comparison=comparison,
                           latest_analysis=recent_analysis,
-                          analyses=all_analyses)
+                          analyses=pagination.items,
+                          pagination=pagination)
 
 
 @web_bp.route('/clients/<int:client_id>/edit', methods=['GET', 'POST'])
 def edit_client(client_id):
     """Edit an existing client."""
-    client = Client.query.get_or_404(client_id)
+    client = db.get_or_404(Client, client_id)
     
     if request.method == 'POST':
         name = request.form.get('name')
@@ -168,8 +251,11 @@ def edit_client(client_id):
         client.website = website
         client.email = email
         client.active = active
+        client.refresh_latest_context()
         
         db.session.commit()
+        invalidate_report_views(*[analysis.id for analysis in client.analyses])
+        invalidate_active_clients()
         
         flash(f"Client {name} updated successfully", "success")
         return redirect(url_for('web.client_detail', client_id=client.id))
@@ -180,42 +266,34 @@ def edit_client(client_id):
 @web_bp.route('/clients/<int:client_id>/delete', methods=['POST'])
 def delete_client(client_id):
     """Delete a client and all related data."""
-    client = Client.query.get_or_404(client_id)
+    client = db.get_or_404(Client, client_id)
+    client_name = client.name
+    analysis_ids = [analysis_id for (analysis_id,) in db.session.query(SiteAnalysis.id).filter_by(client_id=client_id)]
     
     try:
-        # First delete any related agent tasks
-        agent_tasks = AgentTask.query.filter_by(client_id=client_id).all()
-        if agent_tasks:
-            logger.info(f"Deleting {len(agent_tasks)} related agent tasks for client {client.name}")
-            for task in agent_tasks:
-                db.session.delete(task)
-            db.session.commit()
-            
-        # Delete any related conversation history
-        conversation_history = ConversationHistory.query.filter_by(client_id=client_id).all()
-        if conversation_history:
-            logger.info(f"Deleting {len(conversation_history)} related conversation history items for client {client.name}")
-            for history in conversation_history:
-                db.session.delete(history)
-            db.session.commit()
-            
-        # Then delete any related site analyses (which will cascade delete analysis errors)
-        analyses = SiteAnalysis.query.filter_by(client_id=client_id).all()
-        if analyses:
-            logger.info(f"Deleting {len(analyses)} related site analyses for client {client.name}")
-            for analysis in analyses:
-                # Delete related analysis errors first
-                errors = AnalysisError.query.filter_by(analysis_id=analysis.id).all()
-                for error in errors:
-                    db.session.delete(error)
-                # Then delete the analysis
-                db.session.delete(analysis)
-            db.session.commit()
+        # Delete related rows with one bulk statement per table and commit once
+        deleted_tasks = AgentTask.query.filter_by(client_id=client_id).delete(synchronize_session=False)
+        if deleted_tasks:
+            logger.info(f"Deleted {deleted_tasks} related agent tasks for client {client_name}")
+        
+        deleted_history = ConversationHistory.query.filter_by(client_id=client_id).delete(synchronize_session=False)
+        if deleted_history:
+            logger.info(f"Deleted {deleted_history} related conversation history items for client {client_name}")
+        
+        # Delete analysis errors before the site analyses they belong to
+        if analysis_ids:
+            AnalysisError.query.filter(AnalysisError.analysis_id.in_(
+                db.session.query(SiteAnalysis.id).filter_by(client_id=client_id)
+            )).delete(synchronize_session=False)
+            SiteAnalysis.query.filter_by(client_id=client_id).delete(synchronize_session=False)
+            logger.info(f"Deleted {len(analysis_ids)} related site analyses for client {client_name}")
         
-        # Finally delete the client
-        db.session.delete(client)
+        # Finally delete the client; its related rows are already gone, so skip the ORM cascade
+        Client.query.filter_by(id=client_id).delete(synchronize_session=False)
         db.session.commit()
-        flash(f"Client {client.name} deleted successfully", "success")
+        invalidate_report_views(*analysis_ids)
+        invalidate_active_clients()
+        flash(f"Client {client_name} deleted successfully", "success")
     except Exception as e:
         db.session.rollback()
         logger.exception(f"Error deleting client: {str(e)}")
@@ -225,47 +303,51 @@ def delete_client(client_id):
 
 
 @web_bp.route('/reports')
+@cache.cached(timeout=60, unless=_skip_page_cache)
 def list_reports():
     """List all analysis reports."""
-    analyses = SiteAnalysis.query.order_by(desc(SiteAnalysis.analysis_date)).all()
+    # Load each analysis with its client from the join, so rendering doesn't query per row
+    analyses = (SiteAnalysis.query
+                .outerjoin(Client, Client.id == SiteAnalysis.client_id)
+                .options(contains_eager(SiteAnalysis.client))
+                .order_by(desc(SiteAnalysis.analysis_date))
+                .all())
     
     # Add client name to each analysis
     for analysis in analyses:
-        client = Client.query.get(analysis.client_id)
-        analysis.client_name = client.name if client else "Unknown"
+        analysis.client_name = analysis.client.name if analysis.client else "Unknown"
     
     return render_template('reports/list.html', analyses=analyses)
 
 
 @web_bp.route('/reports/<int:analysis_id>')
+@cache.cached(timeout=300, unless=_skip_page_cache, response_filter=_is_cacheable_response)
 def report_detail(analysis_id):
     """Show detailed information about a specific analysis report."""
-    analysis = SiteAnalysis.query.get_or_404(analysis_id)
-    client = Client.query.get(analysis.client_id)
+    analysis = db.get_or_404(SiteAnalysis, analysis_id)
+    client = db.session.get(Client, analysis.client_id)
     
-    # Import needed classes
-    from app.models.database import SemrushIssue
-    from sqlalchemy.orm import joinedload
-    
-    # Get all SEMrush issues from the database to use their metadata
-    semrush_issues = SemrushIssue.query.all()
-    issue_map = {issue.id: issue for issue in semrush_issues}
-    
-    # Get errors for this analysis
-    errors = AnalysisError.query.filter_by(analysis_id=analysis_id).all()
+    # Get errors for this analysis together with the SEMrush issues they reference
+    rows = (db.session.query(AnalysisError, SemrushIssue)
+            .outerjoin(SemrushIssue, SemrushIssue.id == AnalysisError.semrush_issue_id)
+            .filter(AnalysisError.analysis_id == analysis_id)
+            .all())
+    errors = [error for error, issue in rows]
+    semrush_issues = {issue.id: issue for error, issue in rows if issue is not None}
     
     # Enhance errors with issue details from SemrushIssue table if available
-    for error in errors:
-        if error.semrush_issue_id and error.semrush_issue_id in issue_map:
-            issue = issue_map[error.semrush_issue_id]
-            # If we have a count field, include it in the description
-            count_text = f" (Found on {error.count} page{'s' if error.count != 1 else ''})" if error.count else ""
-            error.description = f"{issue.title}{count_text}"
-            # If we have more details in the SemrushIssue table, add them to the error object
-            if issue.description:
-                error.issue_details = issue.description
-            if issue.recommendation:
-                error.issue_recommendation = issue.recommendation
+    for error, issue in rows:
+        if issue is None:
+            continue
+        # If we have a count field, include it in the description. The description is only
+        # changed for display, so set it without marking the error as modified.
+        count_text = f" (Found on {error.count} page{'s' if error.count != 1 else ''})" if error.count else ""
+        set_committed_value(error, 'description', f"{issue.title}{count_text}")
+        # If we have more details in the SemrushIssue table, add them to the error object
+        if issue.description:
+            error.issue_details = issue.description
+        if issue.recommendation:
+            error.issue_recommendation = issue.recommendation
     
     # Group errors by category
     grouped_errors = group_errors_by_category(errors)
@@ -280,43 +362,26 @@ def report_detail(analysis_id):
     # Get comparison data
     comparison = get_comparison_data(previous_analysis, analysis)
     
-    # Create a mapping of issue IDs to titles from the database
-    issue_titles = {issue.id: issue.title for issue in semrush_issues}
-    
-    # Add some fallback titles for common issues if they're not in the database
-    fallback_titles = {
-        "1": "5xx server errors",
-        "2": "4xx client errors",
-        "3": "3xx redirects",
-        "4": "Broken links",
-        "6": "Connection timeout errors",
-        "8": "HTTPS implementation issues",
-        "12": "Mixed content issues",
-        "102": "Missing meta descriptions",
-        "104": "Missing title tags",
-        "112": "Title too short",
-        "117": "Title too long",
-        "123": "Duplicate title tags",
-        "202": "Low content pages",
-        "213": "Missing alt attributes",
-        "215": "Missing or invalid canonical URLs",
-        "216": "Missing H1 headings",
-        "217": "Multiple H1 headings",
-        "218": "Broken images"
+    # Create a mapping of issue IDs to titles from the database, falling back to the
+    # common titles for issues that are not in the database
+    issue_titles = ChainMap({issue_id: issue.title for issue_id, issue in semrush_issues.items()}, FALLBACK_ISSUE_TITLES)
+    
+    context = {
+        'analysis': analysis,
+        'client': client,
+        'errors': errors,
+        'grouped_errors': grouped_errors,
+        'comparison': comparison,
+        'issue_titles': issue_titles,
+        'semrush_issues': semrush_issues
     }
     
-    # Only use fallback titles if the issue is not in the database
-    for issue_id, title in fallback_titles.items():
-        if issue_id not in issue_titles:
-            issue_titles[issue_id] = title
+    # Stream large reports so the browser gets the first part of the page without
+    # waiting for the whole errors table to render
+    if len(errors) > STREAM_REPORT_ERRORS_THRESHOLD:
+        return Response(stream_template('reports/detail.html', **context), mimetype='text/html')
     
-    return render_template('reports/detail.html',
-                          analysis=analysis,
-                          client=client,
-                          errors=errors,
-                          grouped_errors=grouped_errors,
-                          comparison=comparison,
-                          issue_titles=issue_titles)
+    return render_template('reports/detail.html', **context)
 
 
 @web_bp.route('/analyze', methods=['GET', 'POST'])
@@ -327,28 +392,28 @@ def analyze():
         
         if not client_id:
             flash("Please select a client", "danger")
-            clients = Client.query.filter_by(active=True).all()
+            clients = get_active_clients()
             return render_template('analyze.html', clients=clients)
         
         # Redirect to the analyze_client route
         return redirect(url_for('web.analyze_client', client_id=client_id))
     
     # Get active clients
-    clients = Client.query.filter_by(active=True).all()
+    clients = get_active_clients()
     return render_template('analyze.html', clients=clients)
 
 
 @web_bp.route('/analyze/<int:client_id>', methods=['GET', 'POST'])
 def analyze_client(client_id):
     """Run analysis for a specific client."""
-    client = Client.query.get_or_404(client_id)
+    client = db.get_or_404(Client, client_id)
     
     # Create a task for the analysis
     task = AgentTask(
         client_id=client_id,
         task_type='analysis',
         status='pending',
-        parameters=json.dumps({'client_id': client_id})
+        parameters={'client_id': client_id}
     )
     db.session.add(task)
     db.session.commit()
@@ -361,8 +426,8 @@ def analyze_client(client_id):
 @web_bp.route('/tasks/<int:task_id>')
 def task_status(task_id):
     """Show status of a task and update via AJAX."""
-    task = AgentTask.query.get_or_404(task_id)
-    client = Client.query.get(task.client_id)
+    task = db.get_or_404(AgentTask, task_id)
+    client = db.session.get(Client, task.client_id)
     
     # If the task is pending, start processing it
     if task.status == 'pending':
@@ -372,17 +437,14 @@ def task_status(task_id):
             task.started_at = datetime.utcnow()
             
             # Store the current stage in the task parameters
-            task_params = json.loads(task.parameters) if task.parameters else {}
-            task_params['stage'] = 'starting'
-            task.parameters = json.dumps(task_params)
+            task.update_params(stage='starting')
             
             db.session.commit()
             
-            # For analysis tasks, handle the initial setup but don't wait for completion
+            # For analysis tasks, run the initial setup on the background worker pool
+            # so the SEMrush calls don't hold up this request
             if task.task_type == 'analysis':
-                # Only start the analysis process but don't wait for it to complete
-                # This prevents worker timeouts
-                initiate_analysis_task(task)
+                submit_job(run_initiate_analysis, task.id)
             
         except Exception as e:
             # Log the error and update task status
@@ -395,6 +457,21 @@ def task_status(task_id):
     return render_template('task_status.html', task=task, client=client)
 
 
+def run_initiate_analysis(task_id):
+    """
+    Background job that reloads an analysis task and initiates it.
+    
+    Args:
+        task_id (int): ID of the task to initiate
+    """
+    task = db.session.get(AgentTask, task_id)
+    if not task:
+        logger.warning(f"Task {task_id} not found, skipping initiation")
+        return
+    
+    initiate_analysis_task(task)
+
+
 def initiate_analysis_task(task):
     """
     Initiates an analysis task without waiting for completion.
@@ -405,31 +482,25 @@ def initiate_analysis_task(task):
     """
     try:
         # Parse parameters
-        params = json.loads(task.parameters)
-        client_id = params.get('client_id')
+        client_id = task.params.get('client_id')
         
         if not client_id:
             raise ValueError("Client ID is required for analysis task")
         
         # Get the client
-        client = Client.query.get(client_id)
+        client = db.session.get(Client, client_id)
         if not client:
             raise ValueError(f"Client with ID {client_id} not found")
         
         # Update task parameters with project info - will be needed for polling
-        params['stage'] = 'starting_analysis'
-        params['website'] = client.website
-        task.parameters = json.dumps(params)
+        task.update_params(stage='starting_analysis', website=client.website)
         db.session.commit()
         
         # Start the SEMrush workflow but only go up to starting the audit
         # This part doesn't take too long
         try:
-            from app.services.semrush_service import create_project, enable_site_audit, start_site_audit
-            import os
-            
-            # Get API key from environment
-            api_key = os.environ.get('SEMRUSH_API_KEY')
+            # Get API key from the configuration
+            api_key = current_app.config.get('SEMRUSH_API_KEY')
             if not api_key:
                 raise ValueError("SEMrush API key not found")
             
@@ -483,10 +554,8 @@ def initiate_analysis_task(task):
                 raise ValueError(f"Failed to start site audit for project ID: {project_id}")
             
             # Store the project_id and snapshot_id in the task parameters
-            params['project_id'] = project_id
-            params['snapshot_id'] = snapshot_id
-            params['stage'] = 'audit_started'
-            task.parameters = json.dumps(params)
+            task.update_params(project_id=project_id, snapshot_id=snapshot_id, stage='audit_started',
+                               audit_started_at=datetime.utcnow().isoformat())
             db.session.commit()
             
             # Return without waiting for the audit to complete
@@ -510,174 +579,45 @@ def initiate_analysis_task(task):
 @web_bp.route('/api/tasks/<int:task_id>/status')
 def api_task_status(task_id):
     """API endpoint to get the current status of a task."""
-    task = AgentTask.query.get_or_404(task_id)
+    task = db.get_or_404(AgentTask, task_id)
+    
+    # Serve a recent response for the same task state without checking SEMrush again.
+    # Any change to the status, stage, audit status or polling interval gives a new key.
+    params = task.params
+    cache_key = (task.id, task.status, params.get('stage'), params.get('audit_status'), _audit_poll_interval(task))
+    with _task_status_cache_lock:
+        cached = _task_status_cache.get(cache_key)
+    if cached is not None:
+        body, etag = cached
+        return _task_status_response(body, etag)
     
     # If the task is in 'running' state and it's an analysis task, we need to check
     # the actual SEMrush audit status and possibly update the database
     if task.status == 'running' and task.task_type == 'analysis':
         try:
-            params = json.loads(task.parameters) if task.parameters else {}
+            params = task.params
+            stage = params.get('stage')
             # Check if we have started an audit
-            if params.get('stage') == 'audit_started':
+            if stage == 'audit_started':
                 project_id = params.get('project_id')
                 snapshot_id = params.get('snapshot_id')
                 
-                if project_id and snapshot_id:
-                    # Import here to avoid circular imports
-                    from app.services.semrush_service import check_audit_status, get_audit_issues
-                    import os
-                    
+                if _audit_elapsed_seconds(task) > current_app.config['AUDIT_POLL_TIMEOUT']:
+                    # The audit has run far longer than expected, stop waiting for it
+                    task.status = 'failed'
+                    task.error_message = "SEMrush audit timed out"
+                    task.completed_at = datetime.utcnow()
+                    db.session.commit()
+                elif project_id and snapshot_id:
                     # Get API key
-                    api_key = os.environ.get('SEMRUSH_API_KEY')
+                    api_key = current_app.config.get('SEMRUSH_API_KEY')
                     
                     # Check the current status of the audit
                     audit_status = check_audit_status(api_key, project_id, snapshot_id)
                     
-                    # Update response with more detailed status
-                    if audit_status == "completed" or audit_status == "FINISHED":
-                        # Audit is complete, get the results and update the database
-                        website = params.get('website', '')
-                        client_id = params.get('client_id')
-                        client = Client.query.get(client_id)
-                        
-                        # Process the audit results
-                        try:
-                            # Get the parsed domain
-                            if not website.startswith(('http://', 'https://')):
-                                website = 'https://' + website
-                            parsed_url = urlparse(website)
-                            domain = parsed_url.netloc
-                            if domain.startswith("www."):
-                                domain = domain[4:]
-                            
-                            # Get audit issues
-                            issues_data = get_audit_issues(api_key, project_id, snapshot_id, domain)
-                            
-                            if issues_data:
-                                # Create analysis record
-                                campaign_info = issues_data.get('campaign_info', {})
-                                defects = issues_data.get('defects', {})
-                                
-                                # Create a new SiteAnalysis record
-                                analysis = SiteAnalysis(
-                                    client_id=client.id,
-                                    analysis_date=datetime.utcnow(),
-                                    semrush_project_id=project_id,
-                                    semrush_snapshot_id=snapshot_id,
-                                    total_errors=campaign_info.get('errors', 0),
-                                    total_warnings=campaign_info.get('warnings', 0),
-                                    total_notices=campaign_info.get('notices', 0),
-                                    total_broken=campaign_info.get('broken', 0),
-                                    total_blocked=campaign_info.get('blocked', 0),
-                                    total_redirected=campaign_info.get('redirected', 0),
-                                    total_healthy=campaign_info.get('healthy', 0),
-                                    total_pages_crawled=campaign_info.get('pages_crawled', 0),
-                                    total_pages_limit=campaign_info.get('pages_limit', 0),
-                                    pages_with_issues=campaign_info.get('have_issues', 0),
-                                    pages_with_issues_delta=campaign_info.get('have_issues_delta', 0),
-                                    defects=json.dumps(defects),
-                                    raw_response=json.dumps(issues_data)
-                                )
-                                
-                                db.session.add(analysis)
-                                db.session.commit()
-                                
-                                # Add specific errors as AnalysisError records
-                                if defects:
-                                    # Import SemrushIssue model and issues service for getting titles
-                                    from app.models.database import SemrushIssue
-                                    from app.services.semrush_issues_service import get_issue_title
-                                    
-                                    # Get all issue titles for faster lookup
-                                    all_issues = SemrushIssue.query.all()
-                                    
-                                    # Ensure all keys are strings for consistent lookup
-                                    issue_titles = {}
-                                    for issue in all_issues:
-                                        issue_titles[str(issue.id)] = issue.title
-                                        
-                                    # Log the first few issue titles for debugging
-                                    sample_titles = {k: issue_titles[k] for k in list(issue_titles.keys())[:5]} if issue_titles else {}
-                                    logger.info(f"Loaded {len(issue_titles)} issue titles. Sample: {sample_titles}")
-                                    
-                                    for category, items in defects.items():
-                                        for item in items.get('items', []):
-                                            # Try to get the issue ID from the item
-                                            issue_id = item.get('id', '')
-                                            
-                                            # Debug logging to understand the issue better
-                                            logger.debug(f"Processing issue ID: {issue_id}, type: {type(issue_id)}")
-                                            logger.debug(f"Available issue titles keys: {list(issue_titles.keys())[:5]}")
-                                            
-                                            # Get the issue title if available - ensure both are strings for comparison
-                                            issue_title = None
-                                            issue_id_str = str(issue_id)
-                                            if issue_id_str and issue_id_str in issue_titles:
-                                                issue_title = issue_titles[issue_id_str]
-                                                logger.debug(f"Found title for issue {issue_id_str}: {issue_title}")
-                                            else:
-                                                logger.debug(f"No title found for issue {issue_id_str} in titles dictionary")
-                                            
-                                            # Create a more descriptive error text with the format the user wants
-                                            issue_id = item.get('id', '')
-                                            count = item.get('count', 0)
-                                            pages_text = f"Found on {count} page{'s' if count != 1 else ''}"
-                                            
-                                            if issue_title:
-                                                description = f"Issue ID: {issue_id} ({pages_text}) - Issue Title: {issue_title}"
-                                            else:
-                                                description = f"Issue ID: {issue_id} ({pages_text})"
-                                            
-                                            # Convert issue_id to an integer if possible
-                                            try:
-                                                issue_id_int = int(issue_id)
-                                            except (ValueError, TypeError):
-                                                # If conversion fails, log an error but continue with a null value
-                                                logger.warning(f"Could not convert issue_id {issue_id} to integer")
-                                                issue_id_int = None
-                                            
-                                            error = AnalysisError(
-                                                analysis_id=analysis.id,
-                                                error_type=items.get('group', 'warning'),
-                                                category=category,
-                                                description=description,
-                                                url=item.get('url', ''),
-                                                severity=items.get('severity', 5),
-                                                semrush_issue_id=issue_id_int,
-                                                count=count
-                                            )
-                                            db.session.add(error)
-                                    
-                                    db.session.commit()
-                                
-                                # Update the task
-                                task.status = 'completed'
-                                task.completed_at = datetime.utcnow()
-                                task.result = json.dumps({'analysis_id': analysis.id})
-                                db.session.commit()
-                            else:
-                                # No issues data, mark as failed
-                                task.status = 'failed'
-                                task.error_message = "Failed to get audit issues data"
-                                task.completed_at = datetime.utcnow()
-                                db.session.commit()
-                        except Exception as e:
-                            logger.exception(f"Error processing audit results: {str(e)}")
-                            task.status = 'failed'
-                            task.error_message = f"Error processing audit results: {str(e)}"
-                            task.completed_at = datetime.utcnow()
-                            db.session.commit()
-                    elif audit_status == "failed" or audit_status == "FAILED":
-                        # Audit failed, update task status
-                        task.status = 'failed'
-                        task.error_message = "SEMrush audit failed"
-                        task.completed_at = datetime.utcnow()
-                        db.session.commit()
-                    else:
-                        # Audit is still in progress, just update the parameters with the current status
-                        params['audit_status'] = audit_status
-                        task.parameters = json.dumps(params)
-                        db.session.commit()
+                    # Hand the task to the handler for this status
+                    handler = _AUDIT_STATUS_HANDLERS.get((audit_status or '').lower(), _handle_audit_in_progress)
+                    handler(task, params, audit_status)
         except Exception as e:
             logger.exception(f"Error checking audit status: {str(e)}")
             # Don't update the task status here, just log the error
@@ -692,7 +632,7 @@ def api_task_status(task_id):
     # Add task parameters if available
     if task.parameters:
         try:
-            params = json.loads(task.parameters)
+            params = task.params
             response['stage'] = params.get('stage', 'unknown')
             
             # Add audit status if available
@@ -700,23 +640,507 @@ def api_task_status(task_id):
                 response['audit_status'] = params['audit_status']
                 
             # For analysis tasks in progress, add next check time information
-            if task.status == 'running' and task.task_type == 'analysis' and params.get('stage') == 'audit_started':
-                # SEMrush audits can take several minutes, let's add a countdown
-                # We check every 2 minutes to avoid hitting API rate limits
-                response['next_check_in'] = 120  # 2 minutes in seconds
+            poll_interval = _audit_poll_interval(task)
+            if poll_interval is not None:
+                # SEMrush audits can take several minutes, back off the longer it runs
+                response['next_check_in'] = poll_interval
+            elif task.status == 'running' and params.get('stage') == 'ingesting':
+                # Results are ingested on a background worker and should be ready shortly
+                response['next_check_in'] = 5
         except:
             pass
     
     # If task is completed and has a result, include redirect info
     if task.status == 'completed' and task.result:
         try:
-            result = json.loads(task.result)
+            result = task.result
             if 'analysis_id' in result:
                 response['redirect'] = url_for('web.report_detail', analysis_id=result['analysis_id'])
         except:
             pass
     
-    return jsonify(response)
+    body = current_app.json.dumps(response)
+    
+    # A poll that has already seen this exact body gets an empty 304 instead of the same JSON again
+    etag = hashlib.md5(body.encode()).hexdigest()
+    with _task_status_cache_lock:
+        _task_status_cache[cache_key] = (body, etag)
+    return _task_status_response(body, etag)
+
+
+def _handle_audit_completed(task, params, audit_status):
+    """
+    Queue ingestion of a completed audit.
+    
+    Args:
+        task (AgentTask): The analysis task
+        params (dict): The task parameters
+        audit_status (str): Status reported by SEMrush
+    """
+    queue_audit_ingestion(task, params)
+
+
+def queue_audit_ingestion(task, params):
+    """
+    Hand the results of a completed audit to a background worker, unless a concurrent poll
+    (or the scheduler) has already claimed them.
+    
+    Args:
+        task (AgentTask): The analysis task, in the 'audit_started' stage
+        params (dict): The task parameters
+    
+    Returns:
+        bool: True if this call claimed the results and queued the ingestion
+    """
+    website = params.get('website', '')
+    
+    # Get the parsed domain
+    if not website.startswith(('http://', 'https://')):
+        website = 'https://' + website
+    parsed_url = urlparse(website)
+    domain = parsed_url.netloc
+    if domain.startswith("www."):
+        domain = domain[4:]
+    
+    if not task.claim_stage('audit_started', 'ingesting', domain=domain,
+                            ingest_started_at=datetime.utcnow().isoformat()):
+        return False
+    
+    submit_job(ingest_audit_results, task.id)
+    return True
+
+
+def _handle_audit_failed(task, params, audit_status):
+    """
+    Mark the task as failed after SEMrush reports the audit failed.
+    
+    Args:
+        task (AgentTask): The analysis task
+        params (dict): The task parameters
+        audit_status (str): Status reported by SEMrush
+    """
+    task.status = 'failed'
+    task.error_message = "SEMrush audit failed"
+    task.completed_at = datetime.utcnow()
+    db.session.commit()
+
+
+def _handle_audit_in_progress(task, params, audit_status):
+    """
+    Record the current status of an audit that is still running, if it has changed.
+    
+    Args:
+        task (AgentTask): The analysis task
+        params (dict): The task parameters
+        audit_status (str): Status reported by SEMrush
+    """
+    if params.get('audit_status') != audit_status:
+        task.update_params(audit_status=audit_status)
+        db.session.commit()
+
+
+# Handlers for the (lowercased) audit statuses SEMrush reports; any other status means the
+# audit is still in progress
+_AUDIT_STATUS_HANDLERS = {
+    'completed': _handle_audit_completed,
+    'finished': _handle_audit_completed,
+    'done': _handle_audit_completed,
+    'failed': _handle_audit_failed,
+}
+
+
+def _audit_elapsed_seconds(task):
+    """
+    Get how long the task's SEMrush audit has been running.
+    
+    Args:
+        task (AgentTask): Analysis task in the 'audit_started' stage
+    
+    Returns:
+        float: Seconds since the audit was started
+    """
+    started_at = task.params.get('audit_started_at')
+    if started_at:
+        started_at = datetime.fromisoformat(started_at)
+    else:
+        # Tasks started before audit_started_at was recorded
+        started_at = task.started_at or task.created_at
+    return (datetime.utcnow() - started_at).total_seconds()
+
+
+def _next_audit_check_in(elapsed):
+    """
+    Get the number of seconds the browser should wait before polling a running audit again.
+    
+    Most audits finish within AUDIT_POLL_EXPECTED_DURATION, so they are polled at a short,
+    fixed interval until then. After that the interval doubles each time the time spent past
+    that point does, up to AUDIT_POLL_MAX_INTERVAL. The interval only takes a few distinct
+    values, so it can be part of the status response cache key.
+    
+    Args:
+        elapsed (float): Seconds since the audit was started
+    
+    Returns:
+        int: Seconds until the next poll
+    """
+    config = current_app.config
+    interval = config['AUDIT_POLL_INTERVAL']
+    max_interval = config['AUDIT_POLL_MAX_INTERVAL']
+    overdue = elapsed - config['AUDIT_POLL_EXPECTED_DURATION']
+    while interval * 2 <= overdue and interval < max_interval:
+        interval *= 2
+    return min(interval, max_interval)
+
+
+def _audit_poll_interval(task):
+    """
+    Get the polling interval to send for a task, if it is waiting on a SEMrush audit.
+    
+    Args:
+        task (AgentTask): The task being polled
+    
+    Returns:
+        int: Seconds until the next poll, or None if the task isn't waiting on an audit
+    """
+    if task.status == 'running' and task.task_type == 'analysis' and task.params.get('stage') == 'audit_started':
+        return _next_audit_check_in(_audit_elapsed_seconds(task))
+    return None
+
+
+def _task_status_response(body, etag):
+    """
+    Build the task status response, or an empty 304 if the poller already has this version.
+    
+    Args:
+        body (str): JSON response body
+        etag (str): ETag of the response
+    
+    Returns:
+        Response: The response to send
+    """
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        resp = Response(body, mimetype='application/json')
+    resp.set_etag(etag)
+    resp.cache_control.private = True
+    resp.cache_control.max_age = 1
+    return resp
+
+
+def ingest_audit_results(task_id):
+    """
+    Background job that fetches, processes and stores the results of a completed audit.
+    
+    The caller must have moved the task to the 'ingesting' stage with claim_stage first,
+    so each audit is only ingested once.
+    
+    Args:
+        task_id (int): ID of the analysis task
+    """
+    task = db.session.get(AgentTask, task_id)
+    if not task:
+        logger.warning(f"Task {task_id} not found, skipping ingestion")
+        return
+    
+    # A re-queued ingestion may find that an earlier run has already finished the task
+    if task.status != 'running' or task.params.get('stage') != 'ingesting':
+        logger.info(f"Task {task_id} is no longer ingesting, skipping")
+        return
+    
+    try:
+        params = task.params
+        snapshot_id = params.get('snapshot_id')
+        
+        raw_data = fetch_audit_raw(current_app.config.get('SEMRUSH_API_KEY'), params.get('project_id'), snapshot_id)
+        issues_data = process_audit_issues(raw_data, params.get('domain', ''), snapshot_id) if raw_data else None
+        _ingest_audit_results(task, params, issues_data)
+    except Exception as e:
+        logger.exception(f"Error processing audit results: {str(e)}")
+        db.session.rollback()
+        task.status = 'failed'
+        task.error_message = f"Error processing audit results: {str(e)}"
+        task.completed_at = datetime.utcnow()
+        db.session.commit()
+
+
+def _ingest_audit_results(task, params, issues_data):
+    """
+    Store processed audit results as a SiteAnalysis with its errors and complete the task.
+    
+    Everything is saved in one transaction, which is only committed if no re-queued run has
+    claimed the task since this one read it, so an audit is stored at most once.
+    
+    Args:
+        task (AgentTask): The analysis task
+        params (dict): The task parameters
+        issues_data (dict): Processed issues data from process_audit_issues
+    """
+    project_id = params.get('project_id')
+    snapshot_id = params.get('snapshot_id')
+    client = db.session.get(Client, params.get('client_id'))
+    
+    if issues_data:
+        # An earlier run may have stored this snapshot already; complete the task with it
+        existing_id = db.session.scalar(
+            db.select(SiteAnalysis.id).filter_by(client_id=client.id, semrush_snapshot_id=snapshot_id).limit(1)
+        ) if snapshot_id else None
+        if existing_id:
+            logger.info(f"Snapshot {snapshot_id} is already stored as analysis {existing_id}, completing task {task.id}")
+            _finish_ingestion(task, 'completed', result={'analysis_id': existing_id})
+            return
+        
+        # Create analysis record
+        campaign_info = issues_data.get('campaign_info', {})
+        defects = issues_data.get('defects', {})
+        
+        # Create a new SiteAnalysis record
+        analysis = SiteAnalysis(
+            client_id=client.id,
+            analysis_date=datetime.utcnow(),
+            semrush_project_id=project_id,
+            semrush_snapshot_id=snapshot_id,
+            total_errors=campaign_info.get('errors', 0),
+            total_warnings=campaign_info.get('warnings', 0),
+            total_notices=campaign_info.get('notices', 0),
+            total_broken=campaign_info.get('broken', 0),
+            total_blocked=campaign_info.get('blocked', 0),
+            total_redirected=campaign_info.get('redirected', 0),
+            total_healthy=campaign_info.get('healthy', 0),
+            total_pages_crawled=campaign_info.get('pages_crawled', 0),
+            total_pages_limit=campaign_info.get('pages_limit', 0),
+            pages_with_issues=campaign_info.get('have_issues', 0),
+            pages_with_issues_delta=campaign_info.get('have_issues_delta', 0),
+            defects=defects,
+            raw_response=issues_data,
+            issue_summary=summarize_raw_data(issues_data)
+        )
+        
+        db.session.add(analysis)
+        client.refresh_latest_context()
+        
+        # Flush to get the analysis ID; the errors and the task are saved in the same transaction
+        db.session.flush()
+        
+        # Page counts by issue ID from the info endpoint, which reports most audits this way
+        # rather than as items of the defect groups
+        raw_info = issues_data.get('raw_info') or {}
+        defect_counts = raw_info.get('defects') if isinstance(raw_info.get('defects'), dict) else {}
+        
+        # Add specific errors as AnalysisError records
+        if defects or defect_counts:
+            # Get the titles of the issues in this audit for faster lookup
+            needed = set()
+            for items in defects.values():
+                for item in items.get('items', []):
+                    try:
+                        needed.add(int(item.get('id', '')))
+                    except (ValueError, TypeError):
+                        pass
+            for defect_id in defect_counts:
+                try:
+                    needed.add(int(defect_id))
+                except (ValueError, TypeError):
+                    pass
+            all_issues = SemrushIssue.query.filter(SemrushIssue.id.in_(needed)).all() if needed else []
+            
+            # Key titles by the integer issue ID, matching semrush_issue_id
+            issue_titles = {issue.id: issue.title for issue in all_issues}
+            
+            # Log the first few issue titles for debugging
+            sample_titles = {k: issue_titles[k] for k in list(issue_titles.keys())[:5]} if issue_titles else {}
+            logger.info(f"Loaded {len(issue_titles)} issue titles. Sample: {sample_titles}")
+            
+            # Check the log level once so the loop below doesn't build debug messages for nothing
+            debug_enabled = logger.isEnabledFor(logging.DEBUG)
+            if debug_enabled:
+                logger.debug("Available issue titles keys: %s", list(issue_titles.keys())[:5])
+            
+            rows = []
+            for category, items in defects.items():
+                for item in items.get('items', []):
+                    # Try to get the issue ID from the item
+                    issue_id = item.get('id', '')
+                    
+                    # Debug logging to understand the issue better
+                    if debug_enabled:
+                        logger.debug("Processing issue ID: %s, type: %s", issue_id, type(issue_id))
+                    
+                    # Convert issue_id to an integer once; it is used for the title lookup and the record
+                    try:
+                        issue_id_int = int(issue_id)
+                    except (ValueError, TypeError):
+                        # If conversion fails, log an error but continue with a null value
+                        logger.warning(f"Could not convert issue_id {issue_id} to integer")
+                        issue_id_int = None
+                    
+                    # Get the issue title if available
+                    issue_title = issue_titles.get(issue_id_int)
+                    if debug_enabled:
+                        if issue_title:
+                            logger.debug("Found title for issue %s: %s", issue_id_int, issue_title)
+                        else:
+                            logger.debug("No title found for issue %s in titles dictionary", issue_id)
+                    
+                    count = item.get('count', 0)
+                    rows.append({
+                        'analysis_id': analysis.id,
+                        'error_type': items.get('group', 'warning'),
+                        'category': category,
+                        'description': _issue_description(issue_id, count, issue_title),
+                        'url': item.get('url', ''),
+                        'severity': items.get('severity', 5),
+                        'semrush_issue_id': issue_id_int,
+                        'count': count
+                    })
+            
+            # Add the counted issues the defect groups don't list, typed the way SEMrush
+            # categorizes them in this audit, or else by their ID range
+            recorded = {row['semrush_issue_id'] for row in rows}
+            defect_types = _audit_defect_types(raw_info)
+            for defect_id, count in defect_counts.items():
+                try:
+                    issue_id_int = int(defect_id)
+                except (ValueError, TypeError):
+                    logger.warning(f"Could not convert defect ID {defect_id} to integer")
+                    continue
+                
+                if not isinstance(count, int) or count <= 0 or issue_id_int in recorded:
+                    continue
+                
+                error_type, severity = defect_types.get(issue_id_int) or _defect_type_by_id(issue_id_int)
+                rows.append({
+                    'analysis_id': analysis.id,
+                    'error_type': error_type,
+                    'category': 'SEMrush Issue ID',
+                    'description': _issue_description(issue_id_int, count, issue_titles.get(issue_id_int)),
+                    'url': '',
+                    'severity': severity,
+                    'semrush_issue_id': issue_id_int,
+                    'count': count
+                })
+            
+            # Insert the errors in batches rather than tracking each one in the session
+            for start in range(0, len(rows), ERROR_INSERT_BATCH_SIZE):
+                db.session.execute(insert(AnalysisError), rows[start:start + ERROR_INSERT_BATCH_SIZE])
+        
+        # Complete the task, saving the analysis and its errors along with it
+        if _finish_ingestion(task, 'completed', result={'analysis_id': analysis.id}):
+            invalidate_report_views()
+    else:
+        # No issues data, mark as failed
+        _finish_ingestion(task, 'failed', error_message="Failed to get audit issues data")
+
+
+def _finish_ingestion(task, status, **values):
+    """
+    Complete or fail an ingesting task and commit the ingestion's transaction.
+    
+    Like claim_stage, the update only applies if the parameters column still holds what
+    this instance last read. If a re-queued run has claimed the task since, the whole
+    transaction is rolled back and that run's results are kept instead.
+    
+    Args:
+        task (AgentTask): The analysis task, in the 'ingesting' stage
+        status (str): Final task status, 'completed' or 'failed'
+        **values: Other task columns to set
+    
+    Returns:
+        bool: True if the task was updated and the transaction committed
+    """
+    params = dict(task.params, stage=status, skip_future_checks=True)
+    result = db.session.execute(
+        db.update(AgentTask)
+        .where(AgentTask.id == task.id, AgentTask.parameters == task.parameters)
+        .values(status=status, completed_at=datetime.utcnow(), parameters=params, **values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        db.session.rollback()
+        logger.info(f"Task {task.id} was claimed by another ingestion run, discarding these results")
+        return False
+    
+    db.session.commit()
+    return True
+
+
+def _issue_description(issue_id, count, issue_title=None):
+    """
+    Build the stored description of an audit issue.
+    
+    Args:
+        issue_id: SEMrush issue ID
+        count (int): Number of pages the issue was found on
+        issue_title (str, optional): Title of the issue, if known
+    
+    Returns:
+        str: The description
+    """
+    pages_text = f"Found on {count} page{'s' if count != 1 else ''}"
+    if issue_title:
+        return f"Issue ID: {issue_id} ({pages_text}) - Issue Title: {issue_title}"
+    return f"Issue ID: {issue_id} ({pages_text})"
+
+
+def _audit_defect_types(raw_info):
+    """
+    Get the error type and severity SEMrush assigns to the issues of an audit.
+    
+    Args:
+        raw_info (dict): Raw info endpoint response
+    
+    Returns:
+        dict: (error_type, severity) by integer issue ID, for the issues found in the audit
+    """
+    # The categorized issue lists are in current_snapshot, or sometimes at the root level
+    snapshot = raw_info.get('current_snapshot') or raw_info
+    
+    defect_types = {}
+    for key, error_type, severity in DEFECT_GROUP_TYPES:
+        entries = snapshot.get(key)
+        if not isinstance(entries, list):
+            continue
+        for entry in entries:
+            if entry.get('count', 0) > 0:
+                try:
+                    defect_types.setdefault(int(entry.get('id')), (error_type, severity))
+                except (ValueError, TypeError):
+                    pass
+    return defect_types
+
+
+def _defect_type_by_id(issue_id):
+    """
+    Get the error type and severity of a SEMrush issue from its ID range.
+    
+    SEMrush numbers errors below 100, warnings from 100 and notices from 200.
+    
+    Args:
+        issue_id (int): SEMrush issue ID
+    
+    Returns:
+        tuple: (error_type, severity)
+    """
+    if issue_id < 100:
+        return 'error', 8
+    if issue_id < 200:
+        return 'warning', 5
+    return 'notice', 3
+
+
+def run_analysis_task(task_id):
+    """
+    Background job that reloads an analysis task and processes it.
+    
+    Args:
+        task_id (int): ID of the task to process
+    """
+    task = db.session.get(AgentTask, task_id)
+    if not task:
+        logger.warning(f"Task {task_id} not found, skipping analysis")
+        return
+    
+    process_analysis_task(task)
 
 
 def process_analysis_task(task):
@@ -728,14 +1152,13 @@ def process_analysis_task(task):
     """
     try:
         # Parse parameters
-        params = json.loads(task.parameters)
-        client_id = params.get('client_id')
+        client_id = task.params.get('client_id')
         
         if not client_id:
             raise ValueError("Client ID is required for analysis task")
         
-        # Get the client
-        client = Client.query.get(client_id)
+        # Get the client, loading only the columns used here
+        client = db.session.get(Client, client_id, options=[load_only(Client.name, Client.website)])
         if not client:
             raise ValueError(f"Client with ID {client_id} not found")
         
@@ -770,16 +1193,19 @@ def process_analysis_task(task):
             total_pages_limit=campaign_info.get('pages_limit', 0),
             pages_with_issues=campaign_info.get('have_issues', 0),
             pages_with_issues_delta=campaign_info.get('have_issues_delta', 0),
-            defects=json.dumps(campaign_info.get('defects', {})),
-            raw_response=json.dumps(analysis_result)
+            defects=campaign_info.get('defects', {}),
+            raw_response=analysis_result,
+            issue_summary=summarize_raw_data(analysis_result)
         )
         
         db.session.add(analysis)
-        db.session.commit()
+        client.refresh_latest_context()
         
-        # Update the task with the result
-        task.result = json.dumps({'analysis_id': analysis.id})
+        # Flush to get the analysis ID, then save everything in one transaction
+        db.session.flush()
+        task.result = {'analysis_id': analysis.id}
         db.session.commit()
+        invalidate_report_views()
         
         return analysis
     
@@ -792,10 +1218,15 @@ def process_analysis_task(task):
 def chat():
     """Chat interface for asking the AI questions."""
     # Get active clients for the dropdown
-    clients = Client.query.filter_by(active=True).all()
+    clients = get_active_clients()
     
-    # Get recent conversation history
-    history = ConversationHistory.query.order_by(desc(ConversationHistory.timestamp)).limit(10).all()
+    # Get recent conversation history, without the (potentially long) AI responses
+    history = db.session.query(
+        ConversationHistory.id,
+        ConversationHistory.timestamp,
+        ConversationHistory.user_query,
+        ConversationHistory.query_type
+    ).order_by(desc(ConversationHistory.timestamp)).limit(10).all()
     
     return render_template('chat.html', clients=clients, history=history)
 
@@ -815,22 +1246,14 @@ def chat_query():
     
     # If client ID is provided, get context for that client
     if client_id:
-        client = Client.query.get(client_id)
-        
-        # Get recent analyses for context
-        recent_analysis = SiteAnalysis.query.filter_by(client_id=client_id).order_by(desc(SiteAnalysis.analysis_date)).first()
-        
-        if recent_analysis:
-            # Create context from recent analysis
-            context = f"""
-            Website: {client.website}
-            Recent analysis date: {recent_analysis.analysis_date}
-            Summary: {recent_analysis.summary if recent_analysis.summary else 'No summary available'}
-            Total errors: {recent_analysis.total_errors}
-            Total warnings: {recent_analysis.total_warnings}
-            Total notices: {recent_analysis.total_notices}
-            Insights: {recent_analysis.insights if recent_analysis.insights else 'No insights available'}
-            """
+        client = db.session.get(Client, client_id)
+        
+        if client:
+            if client.latest_context is None:
+                # Build the context for clients analyzed before it was stored
+                client.refresh_latest_context()
+                db.session.commit()
+            context = client.latest_context or None
     
     # Get response from AI
     ai_response = run_chat_query(query, context)
@@ -865,33 +1288,44 @@ def content_optimization():
         
         if not url:
             flash("Please enter a URL to analyze", "danger")
-            clients = Client.query.filter_by(active=True).all()
+            clients = get_active_clients()
             return render_template('optimization.html', clients=clients)
         
         # Process keywords
         keyword_list = [k.strip() for k in keywords.split(',') if k.strip()] if keywords else None
         
         # Get client if ID is provided
-        client = Client.query.get(client_id) if client_id else None
+        client = db.session.get(Client, client_id) if client_id else None
         
         # Run content optimization
         optimization_results = optimize_content(client, url, keyword_list)
         
-        # Store results in session for display
-        session['optimization_results'] = optimization_results
+        # Store results for display. With a shared cache only their key goes in the session;
+        # otherwise the next request may reach another worker, so keep them in the session.
+        session.pop('optimization_results', None)
+        session.pop('optimization_results_key', None)
+        results_key = uuid.uuid4().hex
+        if has_shared_cache() and cache.set(f"optimization:{results_key}", optimization_results, timeout=OPTIMIZATION_RESULTS_TTL):
+            session['optimization_results_key'] = results_key
+        else:
+            session['optimization_results'] = optimization_results
         
         return redirect(url_for('web.optimization_results'))
     
     # Get active clients
-    clients = Client.query.filter_by(active=True).all()
+    clients = get_active_clients()
     return render_template('optimization.html', clients=clients)
 
 
 @web_bp.route('/optimization/results')
 def optimization_results():
     """Show content optimization results."""
-    # Get results from session
-    results = session.get('optimization_results')
+    # Get results stored by content_optimization, from the cache or the session
+    results_key = session.get('optimization_results_key')
+    if results_key:
+        results = cache.get(f"optimization:{results_key}")
+    else:
+        results = session.get('optimization_results')
     
     if not results:
         flash("No optimization results found", "warning")
@@ -903,33 +1337,54 @@ def optimization_results():
 @web_bp.route('/reports/<int:analysis_id>/generate-insights')
 def generate_insights(analysis_id):
     """Generate AI insights and recommendations for an analysis report."""
-    analysis = SiteAnalysis.query.get_or_404(analysis_id)
-    client = Client.query.get(analysis.client_id)
+    analysis = db.get_or_404(SiteAnalysis, analysis_id)
+    
+    # Create a task for generating insights and run it on the background worker pool,
+    # so the OpenAI calls don't hold up this request
+    task = AgentTask(
+        client_id=analysis.client_id,
+        task_type='generate_insights',
+        status='running',
+        started_at=datetime.utcnow(),
+        parameters={'analysis_id': analysis_id}
+    )
+    db.session.add(task)
+    db.session.commit()
+    
+    submit_job(run_generate_insights, task.id)
+    
+    return redirect(url_for('web.task_status', task_id=task.id))
+
+
+def run_generate_insights(task_id):
+    """
+    Background job that generates AI insights and recommendations for an analysis report.
+    
+    Args:
+        task_id (int): ID of the generate_insights task
+    """
+    task = db.session.get(AgentTask, task_id)
+    if not task:
+        logger.warning(f"Task {task_id} not found, skipping insights generation")
+        return
     
     try:
-        # Create a task for generating insights
-        task = AgentTask(
-            client_id=client.id,
-            task_type='generate_insights',
-            status='pending',
-            parameters=json.dumps({'analysis_id': analysis_id})
-        )
-        db.session.add(task)
-        db.session.commit()
+        # Load only the columns the analyzer reads
+        analysis_id = task.params.get('analysis_id')
+        analysis = db.session.get(SiteAnalysis, analysis_id, options=[load_only(
+            SiteAnalysis.client_id, SiteAnalysis.total_errors, SiteAnalysis.total_warnings,
+            SiteAnalysis.total_notices, SiteAnalysis.total_broken, SiteAnalysis.total_redirected,
+            SiteAnalysis.total_healthy, SiteAnalysis.issue_summary
+        )])
+        if not analysis:
+            raise ValueError(f"Analysis with ID {analysis_id} not found")
+        client = db.session.get(Client, analysis.client_id, options=[load_only(Client.website)])
         
-        # Update task status
-        task.status = 'running'
-        task.started_at = datetime.utcnow()
-        db.session.commit()
+        # Use the stored summary of the raw data; older analyses only have the full raw data
+        raw_data = analysis.issue_summary or analysis.raw_data
         
         # Generate insights and recommendations using the SEO analyzer
-        from app.agents.seo_analyzer import generate_insights
-        
-        # Get raw data from the analysis
-        raw_data = json.loads(analysis.raw_response) if analysis.raw_response else {}
-        
-        # Generate insights
-        insights = generate_insights(
+        insights = _generate_insights_impl(
             website=client.website,
             errors=analysis.total_errors,
             warnings=analysis.total_warnings,
@@ -944,22 +1399,24 @@ def generate_insights(analysis_id):
         if insights:
             analysis.insights = insights.get('insights', '')
             analysis.recommendations = insights.get('recommendations', '')
+            client.refresh_latest_context()
             db.session.commit()
+            invalidate_report_views(analysis.id)
         
-        # Update task status
+        # Update task status; the status page redirects back to the report
         task.status = 'completed'
         task.completed_at = datetime.utcnow()
-        task.result = json.dumps({'success': True})
+        task.result = {'success': True, 'analysis_id': analysis.id}
         db.session.commit()
-        
-        flash("AI insights and recommendations generated successfully", "success")
     
     except Exception as e:
-        # Log the error and handle it
+        # Log the error and mark the task as failed
+        db.session.rollback()
         logger.exception(f"Error generating insights: {str(e)}")
-        flash(f"Error generating insights: {str(e)}", "danger")
-    
-    return redirect(url_for('web.report_detail', analysis_id=analysis_id))
+        task.status = 'failed'
+        task.error_message = f"Error generating insights: {str(e)}"
+        task.completed_at = datetime.utcnow()
+        db.session.commit()
 
 
 @web_bp.route('/settings', methods=['GET', 'POST'])
@@ -985,11 +1442,8 @@ def settings():
 @web_bp.route('/test-semrush-api')
 def test_semrush_api():
     """Test the SEMrush API connection."""
-    import os
-    import requests
-    
-    # Get API key from environment
-    api_key = os.environ.get('SEMRUSH_API_KEY')
+    # Get API key from config
+    api_key = current_app.config.get('SEMRUSH_API_KEY')
     
     if not api_key:
         flash("SEMrush API key is not configured. Please add your API key in the settings.", "danger")
@@ -999,11 +1453,11 @@ def test_semrush_api():
     projects_url = f"https://api.semrush.com/management/v1/projects?key={api_key}"
     
     try:
-        response = requests.get(projects_url)
+        response = semrush_session.get(projects_url)
         
         if response.status_code == 200:
             # Success! Count projects 
-            projects = response.json()
+            projects = orjson.loads(response.content)
             project_count = len(projects)
             
             flash(f"SEMrush API connection successful! Found {project_count} projects.", "success")
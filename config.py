@@ -1,4 +1,5 @@
 import os
+import orjson
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -15,8 +16,17 @@ class Config:
     SQLALCHEMY_ENGINE_OPTIONS = {
         "pool_recycle": 300,
         "pool_pre_ping": True,
+        # Serialize JSON columns with orjson
+        "json_serializer": lambda obj: orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode(),
+        "json_deserializer": orjson.loads,
     }
     
+    # Cache (use CACHE_TYPE=RedisCache with REDIS_URL to share it between workers; pages are
+    # only cached when it is shared)
+    CACHE_TYPE = os.environ.get('CACHE_TYPE', 'SimpleCache')
+    CACHE_REDIS_URL = os.environ.get('REDIS_URL')
+    CACHE_DEFAULT_TIMEOUT = 300
+    
     # SEMrush API
     SEMRUSH_API_KEY = os.environ.get('SEMRUSH_API_KEY')
     SEMRUSH_API_URL = 'https://api.semrush.com'
@@ -35,6 +45,14 @@ class Config:
     # Application settings
     SCHEDULER_TIMEZONE = 'UTC'
     ANALYSIS_FREQUENCY = os.environ.get('ANALYSIS_FREQUENCY', 'weekly')  # 'daily', 'weekly', 'monthly'
+    WORKER_THREADS = int(os.environ.get('WORKER_THREADS', 4))  # Background worker pool size
+    
+    # SEMrush audit polling: poll every AUDIT_POLL_INTERVAL seconds for the expected duration
+    # of an audit, then back off up to AUDIT_POLL_MAX_INTERVAL; give up after AUDIT_POLL_TIMEOUT
+    AUDIT_POLL_INTERVAL = int(os.environ.get('AUDIT_POLL_INTERVAL', 15))
+    AUDIT_POLL_EXPECTED_DURATION = int(os.environ.get('AUDIT_POLL_EXPECTED_DURATION', 180))
+    AUDIT_POLL_MAX_INTERVAL = int(os.environ.get('AUDIT_POLL_MAX_INTERVAL', 300))
+    AUDIT_POLL_TIMEOUT = int(os.environ.get('AUDIT_POLL_TIMEOUT', 180 + 30 * 60))
 
 
 class DevelopmentConfig(Config):
@@ -54,6 +72,7 @@ class TestingConfig(Config):
     DEBUG = True
     TESTING = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    CACHE_TYPE = 'NullCache'
 
 
 # Configuration dictionary
@@ -64,8 +83,10 @@ config = {
     'default': DevelopmentConfig
 }
 
+# Configuration selected by the environment, resolved once at import time
+_CONFIG = config.get(os.environ.get('FLASK_ENV', 'default'), config['default'])
+
 # Get configuration based on environment
 def get_config():
     """Return the appropriate configuration object based on the environment."""
-    config_name = os.environ.get('FLASK_ENV', 'default')
-    return config.get(config_name, config['default'])
\ No newline at end of file
+    return _CONFIG
\ No newline at end of file
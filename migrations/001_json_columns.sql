@@ -0,0 +1,27 @@
+-- Convert the JSON text columns to JSONB.
+--
+-- Run once against an existing PostgreSQL database:
+--   psql "$DATABASE_URL" -f migrations/001_json_columns.sql
+--
+-- Rows written by the old /api/clients/<id>/analyze endpoint stored a Python repr rather
+-- than JSON in raw_response; those values could never be parsed and are set to NULL.
+
+BEGIN;
+
+CREATE OR REPLACE FUNCTION pg_temp.try_jsonb(value text) RETURNS jsonb AS $$
+BEGIN
+    RETURN value::jsonb;
+EXCEPTION WHEN others THEN
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql IMMUTABLE;
+
+ALTER TABLE site_analysis
+    ALTER COLUMN raw_response TYPE jsonb USING pg_temp.try_jsonb(raw_response),
+    ALTER COLUMN defects TYPE jsonb USING pg_temp.try_jsonb(defects);
+
+ALTER TABLE agent_task
+    ALTER COLUMN parameters TYPE jsonb USING pg_temp.try_jsonb(parameters),
+    ALTER COLUMN result TYPE jsonb USING pg_temp.try_jsonb(result);
+
+COMMIT;
@@ -0,0 +1,8 @@
+-- Index for listing the most recent conversation history.
+--
+-- New databases get this index when the table is created. On an existing table, run this
+-- so the index is built without blocking writes:
+--   psql "$DATABASE_URL" -f migrations/002_conversation_history_timestamp_index.sql
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_conversation_history_timestamp
+    ON conversation_history (timestamp DESC);
@@ -0,0 +1,6 @@
+-- Add the stored chat context to existing client tables.
+--   psql "$DATABASE_URL" -f migrations/003_client_latest_context.sql
+--
+-- The context is built on first use for clients analyzed before this column existed.
+
+ALTER TABLE client ADD COLUMN IF NOT EXISTS latest_context TEXT;
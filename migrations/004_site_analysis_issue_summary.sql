@@ -0,0 +1,6 @@
+-- Add the stored issue summary used for AI insights to existing site_analysis tables.
+--   psql "$DATABASE_URL" -f migrations/004_site_analysis_issue_summary.sql
+--
+-- Analyses without a summary fall back to their full raw_response.
+
+ALTER TABLE site_analysis ADD COLUMN IF NOT EXISTS issue_summary jsonb;
@@ -0,0 +1,18 @@
+-- Indexes for looking up analyses, errors, tasks and chat history by their parent rows.
+--   psql "$DATABASE_URL" -f migrations/005_parent_id_indexes.sql
+--
+-- New databases get these indexes when the tables are created. CREATE INDEX CONCURRENTLY
+-- builds them on existing tables without blocking writes; it cannot run inside a
+-- transaction block, so run this file with psql as is.
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_site_analysis_client_date
+    ON site_analysis (client_id, analysis_date DESC);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_analysis_error_analysis_id
+    ON analysis_error (analysis_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_agent_task_client_id
+    ON agent_task (client_id);
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_conversation_history_client_id
+    ON conversation_history (client_id);
@@ -0,0 +1,23 @@
+import logging
+import time
+
+from app import create_app
+from app.services.scheduler_service import start_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Create the application instance the scheduled jobs run against
+app = create_app()
+
+if __name__ == "__main__":
+    # Run the APScheduler in this process only, so running several web workers
+    # doesn't start several schedulers firing the same jobs
+    with app.app_context():
+        scheduler = start_scheduler(app)
+    
+    try:
+        while True:
+            time.sleep(3600)
+    except (KeyboardInterrupt, SystemExit):
+        logger.info("Shutting down scheduler")
+        scheduler.shutdown()